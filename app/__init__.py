@@ -5,9 +5,23 @@ from flask import Flask, request
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, current_user
 from flask_mail import Mail
+from flask_migrate import Migrate
 from itsdangerous import URLSafeTimedSerializer
 from dotenv import load_dotenv
 from flask_dance.contrib.google import make_google_blueprint
+from .db_profile import database_uri, engine_options, init_database
+from .passwords import normalise_method
+from .routing import CampusGraph
+from .buffered_writer import BufferedWriter
+from .chat_cache import ChatCache
+from .llm_pool import LLMPool
+from .places import PlaceStore
+from .spatial import PlaceIndex
+from .user_cache import UserCache
+from .email_outbox import EmailOutbox
+from .route_table import RouteTable
+from .gemini import GeminiClient
+from .assets import AssetPipeline
 
 
 # Load environment variables
@@ -22,7 +36,20 @@ if os.getenv("FLASK_ENV") == "development":
 # -------------------
 db = SQLAlchemy()
 mail = Mail()
+email_outbox = EmailOutbox()
+migrate = Migrate()
 login_manager = LoginManager()
+user_cache = UserCache()
+campus_graph = CampusGraph()
+pageview_writer = BufferedWriter()
+activity_writer = BufferedWriter()
+chat_cache = ChatCache()
+llm_pool = LLMPool()
+gemini = GeminiClient()
+place_store = PlaceStore()
+place_index = PlaceIndex()
+route_table = RouteTable()
+asset_pipeline = AssetPipeline()
 serializer = URLSafeTimedSerializer(os.getenv("SECRET_KEY", secrets.token_hex(32)))
 
 
@@ -33,30 +60,98 @@ def create_app():
     # Config
     # -------------------
     app.config['SECRET_KEY'] = os.getenv("SECRET_KEY", secrets.token_hex(32))
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri(os.getenv("DATABASE_URL"))
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-    # SQLite concurrency tweak (dev only)
-    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-        "connect_args": {"check_same_thread": False}
-    }
+    # Connection pool + SQLite pragmas (see db_profile.py)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+        app.config['SQLALCHEMY_DATABASE_URI'],
+        pool_size=int(os.getenv("DB_POOL_SIZE", 5)),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 10)),
+    )
+    app.config['SQLITE_PROFILE'] = os.getenv("SQLITE_PROFILE", "wal")  # wal or default
+    for key in ("SQLITE_BUSY_TIMEOUT_MS", "SQLITE_MMAP_SIZE", "SQLITE_CACHE_SIZE"):
+        app.config[key] = os.getenv(key)
+
+    # Pageview buffer config
+    app.config['PAGEVIEW_BATCH_SIZE'] = int(os.getenv("PAGEVIEW_BATCH_SIZE", 200))
+    app.config['PAGEVIEW_FLUSH_INTERVAL'] = float(os.getenv("PAGEVIEW_FLUSH_INTERVAL", 2.0))
+    app.config['PAGEVIEW_QUEUE_SIZE'] = int(os.getenv("PAGEVIEW_QUEUE_SIZE", 10000))
+    app.config['PAGEVIEW_QUEUE_POLICY'] = os.getenv("PAGEVIEW_QUEUE_POLICY", "drop")  # or "block"
+
+    # Admin activity feed buffer and read-event policy (see activity_log.py)
+    app.config['ACTIVITY_BATCH_SIZE'] = int(os.getenv("ACTIVITY_BATCH_SIZE", 50))
+    app.config['ACTIVITY_FLUSH_INTERVAL'] = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", 2.0))
+    app.config['ACTIVITY_QUEUE_SIZE'] = int(os.getenv("ACTIVITY_QUEUE_SIZE", 10000))
+    app.config['ACTIVITY_QUEUE_POLICY'] = os.getenv("ACTIVITY_QUEUE_POLICY", "block")  # or "drop"
+    app.config['ACTIVITY_READ_POLICY'] = os.getenv("ACTIVITY_READ_POLICY", "skip")  # log, sample or skip
+    app.config['ACTIVITY_READ_SAMPLE_RATE'] = float(os.getenv("ACTIVITY_READ_SAMPLE_RATE", 0.1))
+
+    # Password hashing policy, e.g. pbkdf2:sha256:600000 or scrypt:16384:8:1 (see passwords.py)
+    app.config['PASSWORD_HASH_METHOD'] = normalise_method(os.getenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256"))
+
+    # Raw event retention (see retention.py)
+    app.config['RETENTION_DAYS'] = int(os.getenv("RETENTION_DAYS", 90))
+    app.config['ARCHIVE_DIR'] = os.getenv("ARCHIVE_DIR")  # default: instance/archive
+
+    # Chat response cache config
+    app.config['CHAT_CACHE_BACKEND'] = os.getenv("CHAT_CACHE_BACKEND", "memory")  # memory, sqlite or none
+    app.config['CHAT_CACHE_TTL'] = int(os.getenv("CHAT_CACHE_TTL", 3600))
+    app.config['CHAT_CACHE_MAX_ENTRIES'] = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", 1000))
+
+    # Outbound LLM call limits
+    app.config['LLM_MAX_CONCURRENCY'] = int(os.getenv("LLM_MAX_CONCURRENCY", 4))
+    app.config['LLM_MAX_QUEUE'] = int(os.getenv("LLM_MAX_QUEUE", 2))
+    app.config['LLM_TIMEOUT'] = float(os.getenv("LLM_TIMEOUT", 20))
+
+    # Gemini client, created on the first chat request (see gemini.py)
+    app.config['GOOGLE_API_KEY'] = os.getenv("GOOGLE_API_KEY")
 
     # Mail config
-    app.config['MAIL_SERVER'] = 'smtp.gmail.com'
-    app.config['MAIL_PORT'] = 587
-    app.config['MAIL_USE_TLS'] = True
+    app.config['MAIL_SERVER'] = os.getenv("MAIL_SERVER", 'smtp.gmail.com')
+    app.config['MAIL_PORT'] = int(os.getenv("MAIL_PORT", 587))
+    app.config['MAIL_USE_TLS'] = os.getenv("MAIL_USE_TLS", "true").lower() == "true"
     app.config['MAIL_USERNAME'] = os.getenv("MAIL_USERNAME")
     app.config['MAIL_PASSWORD'] = os.getenv("MAIL_PASSWORD")
     app.config['MAIL_DEFAULT_SENDER'] = os.getenv("MAIL_DEFAULT_SENDER", app.config['MAIL_USERNAME'])
+    app.config['MAIL_TRANSPORT'] = os.getenv("MAIL_TRANSPORT", "smtp")  # smtp or file (writes .eml files)
+
+    # Campus routing: path clean-up tolerance and search mode (see graph_prep.py, landmarks.py)
+    app.config['CAMPUS_SNAP_TOLERANCE_M'] = float(os.getenv("CAMPUS_SNAP_TOLERANCE_M", 1.0))
+    app.config['ROUTING_MODE'] = os.getenv("ROUTING_MODE", "astar")  # astar or alt
+    app.config['ALT_LANDMARKS'] = int(os.getenv("ALT_LANDMARKS", 8))
+
+    # Fingerprinted, pre-compressed static assets under /assets (see assets.py)
+    app.config['ASSET_MAX_AGE'] = int(os.getenv("ASSET_MAX_AGE", 31536000))
+    app.config['ASSET_CACHE_DIR'] = os.getenv("ASSET_CACHE_DIR", os.path.join(app.instance_path, "assets"))
 
     # -------------------
     # Initialize extensions
     # -------------------
     db.init_app(app)
+    init_database(app, db)
     mail.init_app(app)
+    email_outbox.init_app(app, mail)
+    migrate.init_app(app, db, directory=os.path.join(os.path.dirname(app.root_path), "migrations"),
+                     render_as_batch=True)
     login_manager.init_app(app)
     login_manager.login_view = "auth.login"
 
+    from .models import User
+    app.config['USER_CACHE_TTL'] = float(os.getenv("USER_CACHE_TTL", 60))
+    app.config['USER_CACHE_AUTH_TTL'] = float(os.getenv("USER_CACHE_AUTH_TTL", 5))
+    user_cache.init_app(app, db, User)
+
+    # Walking graph for /api/route, built once per process on first use
+    campus_graph.init_app(app)
+    chat_cache.init_app(app)
+    llm_pool.init_app(app)
+    gemini.init_app(app)
+    place_store.init_app(app)
+    place_index.init_app(app, place_store)
+    route_table.init_app(app, campus_graph, place_store)
+    asset_pipeline.init_app(app)
+
     # -------------------
     # Google OAuth
     # -------------------
@@ -78,64 +173,52 @@ def create_app():
     from .auth import auth_bp
     from .routes import main
     from .admin import admin_bp
+    from .api import api_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(main)
     app.register_blueprint(admin_bp)
+    app.register_blueprint(api_bp)
 
     # -------------------
     # Pageview Logging
     # -------------------
+    # Pageviews are queued and bulk-inserted by a background thread instead
+    # of committing once per request (see PAGEVIEW_* settings).
+    from .models import PageView
+    from .rollups import record_pageviews
+    pageview_writer.init_app(app, PageView, prefix="PAGEVIEW", on_flush=record_pageviews)
+
+    from .models import ActivityLog
+    from .activity_log import READ_POLICIES
+    if app.config['ACTIVITY_READ_POLICY'] not in READ_POLICIES:
+        raise ValueError("ACTIVITY_READ_POLICY must be 'log', 'sample' or 'skip'")
+    activity_writer.init_app(app, ActivityLog, prefix="ACTIVITY")
+
     @app.before_request
     def log_pageview():
         # Skip static files & favicon
-        if request.endpoint in ("static", None) or request.path.startswith("/favicon"):
+        if request.endpoint in ("static", "assets", None) or request.path.startswith("/favicon"):
             return
 
-        try:
-            from .models import PageView
-
-            pageview = PageView(
-                page=request.path,
-                timestamp=datetime.utcnow(),
-                view_date=date.today(),
-                user_id=current_user.id if current_user.is_authenticated else None,
-                user_ip=request.remote_addr
-            )
-            db.session.add(pageview)
-            db.session.commit()
-            print(f"✅ Logged pageview: {request.path}")
-        except Exception as e:
-            db.session.rollback()
-            print(f"⚠️ Pageview logging failed: {e}")
+        pageview_writer.enqueue({
+            "page": request.path,
+            "timestamp": datetime.utcnow(),
+            "view_date": date.today(),
+            "user_id": current_user.id if current_user.is_authenticated else None,
+            "user_ip": request.remote_addr,
+        })
 
     # -------------------
-    # Create DB tables
+    # Database setup
     # -------------------
-    with app.app_context():
-        db.create_all()
-        
-        from .models import User
-        from werkzeug.security import generate_password_hash
-
-        existing_admin = User.query.filter_by(username="admin").first()
-        if existing_admin:
-            existing_admin.name = "Administrator"
-            existing_admin.email = "admin@example.com"
-            existing_admin.password = generate_password_hash("admin123")
-            existing_admin.role = "admin"
-            db.session.commit()
-            print("✅ Admin user overwritten")
-        else:
-            default_admin = User(
-                name="Administrator",
-                username="admin",
-                email="admin@example.com",
-                password=generate_password_hash("admin123"),
-                role="admin"
-            )
-            db.session.add(default_admin)
-            db.session.commit()
-            print("✅ Admin user created")
+    # FTS index for the admin user search, created alongside the user table
+    from .user_search import register_fts
+    register_fts()
+
+    # Tables, the default admin and the rollup backfill are set up once with
+    # `flask init-db`, not on every worker start.
+    from .cli import register_commands
+    register_commands(app)
 
     return app
@@ -0,0 +1,78 @@
+# activity_log.py
+"""
+Admin activity feed.
+
+``log_activity`` no longer commits its own transaction: events are queued
+on ``activity_writer`` (a BufferedWriter, see ACTIVITY_* settings) and
+bulk-inserted off the request path. Each event is stamped when it is
+logged, so the feed orders it the same way whether or not it has reached
+the database yet; ``recent_activities`` merges still-queued events with
+the stored ones.
+
+Pure page views ("Viewed Admin Dashboard") are logged with ``read=True``
+and go through ACTIVITY_READ_POLICY:
+  log     keep every one
+  sample  keep a random ACTIVITY_READ_SAMPLE_RATE fraction
+  skip    keep none (default), so admin page loads don't write at all
+"""
+import random
+from datetime import datetime
+
+from flask import current_app
+
+from app import activity_writer
+from .models import ActivityLog, User
+
+READ_POLICIES = ("log", "sample", "skip")
+
+
+class PendingActivity:
+    """A queued activity, shaped like ActivityLog for the dashboard template."""
+
+    def __init__(self, action, timestamp, user):
+        self.action = action
+        self.timestamp = timestamp
+        self.user = user
+
+
+def keep_read_event():
+    policy = current_app.config.get("ACTIVITY_READ_POLICY", "skip")
+    if policy == "log":
+        return True
+    if policy == "sample":
+        return random.random() < float(current_app.config.get("ACTIVITY_READ_SAMPLE_RATE", 0.1))
+    return False
+
+
+def log_activity(action, user=None, read=False):
+    """Queue an activity. Returns False if it was skipped or dropped."""
+    if read and not keep_read_event():
+        return False
+    return activity_writer.enqueue({
+        "action": action,
+        "user_id": user.id if user else None,
+        "timestamp": datetime.utcnow(),
+    })
+
+
+def recent_activities(limit=10):
+    """The newest ``limit`` activities, including ones not written yet."""
+    # pending first: a row committed in between then shows up in both and is
+    # de-duplicated below, instead of in neither
+    pending = activity_writer.pending()
+    stored = ActivityLog.query.order_by(ActivityLog.timestamp.desc()).limit(limit).all()
+
+    seen = {(a.action, a.user_id, a.timestamp) for a in stored}
+    pending = [
+        row for row in pending[-limit:]
+        if (row["action"], row["user_id"], row["timestamp"]) not in seen
+    ]
+    user_ids = {row["user_id"] for row in pending if row["user_id"]}
+    users = {u.id: u for u in User.query.filter(User.id.in_(user_ids))} if user_ids else {}
+
+    merged = stored + [
+        PendingActivity(row["action"], row["timestamp"], users.get(row["user_id"]))
+        for row in pending
+    ]
+    merged.sort(key=lambda a: a.timestamp, reverse=True)
+    return merged[:limit]
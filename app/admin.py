@@ -1,27 +1,21 @@
 # admin.py
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
-from app import db
-from .models import User , Location, Visit, ActivityLog , PageView
+from app import db, place_store, place_index
+from .models import User , Location
+from .models import DailyLocationVisits, DailyPageViews, DailySignups
+from .user_search import search_users
+from .location_import import import_features, changed_locations
+from .visit_log import MAX_VISIT_BATCH, log_visits
+from .activity_log import log_activity, recent_activities
 import json
-from sqlalchemy import func, Date, cast
-import os
-from datetime import datetime, date, timedelta, time
-
-with open("app/static/campus_places.geojson") as f:  
-    campus_places = json.load(f)
+from sqlalchemy import func
+from datetime import datetime, date, timedelta
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
 
-GEOJSON_PATH = os.path.join("app", "static", "campus_places.geojson")
-
+MAX_SEARCH_RESULTS = 50
 
-def log_activity(action, user=None):
-    entry = ActivityLog(action=action)
-    if user:
-        entry.user = user
-    db.session.add(entry)
-    db.session.commit()
 
 # -------------------
 # ADMIN ACCESS DECORATOR
@@ -42,32 +36,30 @@ def admin_required(func):
 @admin_bp.route("/dashboard")
 @admin_required
 def dashboard():
-    log_activity("Viewed Admin Dashboard", user=current_user)
+    log_activity("Viewed Admin Dashboard", user=current_user, read=True)
 
-    users = User.query.all()
-    total_users = len(users)
+    total_users = User.query.count()
     active_users = User.query.filter_by(is_active=True).count() if hasattr(User, "is_active") else total_users
 
     popular_locations = (
-        db.session.query(Location.name, func.count(Visit.id).label("visits"))
-        .join(Visit)
+        db.session.query(Location.name, func.sum(DailyLocationVisits.visits).label("visits"))
+        .join(DailyLocationVisits)
         .group_by(Location.id)
-        .order_by(func.count(Visit.id).desc())
+        .order_by(func.sum(DailyLocationVisits.visits).desc())
         .limit(3)
         .all()
     )
     popular_locations = [loc[0] for loc in popular_locations]
 
-    # Fetch last 10 activities
-    recent_activities = ActivityLog.query.order_by(ActivityLog.timestamp.desc()).limit(10).all()
+    # Last 10 activities, including ones still waiting to be written
+    activities = recent_activities(10)
 
     today = datetime.utcnow().date()
     seven_days_ago = today - timedelta(days=6)
 
     user_growth = (
-        db.session.query(func.date(User.created_at), func.count(User.id))
-        .filter(User.created_at >= seven_days_ago)
-        .group_by(func.date(User.created_at))
+        db.session.query(DailySignups.day, DailySignups.signups)
+        .filter(DailySignups.day >= seven_days_ago)
         .all()
     )
 
@@ -80,10 +72,9 @@ def dashboard():
 
     return render_template(
         "admin_dashboard.html",
-        users=users,
         total_users=total_users,
         active_users=active_users,
-        recent_activities=recent_activities,
+        recent_activities=activities,
         popular_locations=popular_locations,
         growth_labels=json.dumps(labels),   # ✅ Pass to JS safely
         growth_data=json.dumps(data)
@@ -95,15 +86,27 @@ def dashboard():
 @admin_required
 def users():
     search_query = request.args.get("q", "")
-    if search_query:
-        users_list = User.query.filter(
-            (User.username.contains(search_query)) | 
-            (User.email.contains(search_query)) | 
-            (User.name.contains(search_query))
-        ).all()
-    else:
-        users_list = User.query.all()
-    return render_template("admin_users.html", users=users_list, search_query=search_query)
+    after = request.args.get("after", 0, type=int)
+    users_list, next_after = search_users(search_query, after=after)
+    return render_template("admin_users.html", users=users_list, search_query=search_query,
+                           after=after, next_after=next_after)
+
+
+@admin_bp.route("/users/search")
+@admin_required
+def users_search():
+    """JSON type-ahead: {"users": [...], "next": <after id or null>}."""
+    limit = min(max(request.args.get("limit", 10, type=int), 1), MAX_SEARCH_RESULTS)
+    users_list, next_after = search_users(
+        request.args.get("q", ""), after=request.args.get("after", 0, type=int), limit=limit
+    )
+    return jsonify({
+        "users": [
+            {"id": u.id, "username": u.username, "name": u.name, "email": u.email, "role": u.role}
+            for u in users_list
+        ],
+        "next": next_after,
+    })
 
 
 # -------------------
@@ -180,50 +183,28 @@ def toggle_active(user_id):
         log_activity(f"{'Activated' if user.is_active else 'Deactivated'} user {user.username}", user=current_user)
     return redirect(url_for("admin.users"))
 
-from datetime import date
-from .models import PageView
-
 @admin_bp.route("/analytics")
 @admin_required
 def analytics():
-    log_activity("Viewed Analytics Page", user=current_user)
+    log_activity("Viewed Analytics Page", user=current_user, read=True)
 
     today = date.today()
-    start = datetime.combine(today, time.min)  # 00:00:00
-    end = datetime.combine(today, time.max)    
 
     # -------------------
-    # 1️⃣ Load campus GeoJSON
+    # 1️⃣ Campus GeoJSON (shared in-memory copy)
     # -------------------
-    geojson_path = os.path.join(current_app.root_path, "static", "campus_places.geojson")
-    campus_geojson = {}
-    total_locations = 0
-    categories = {"Faculty": 0, "Food": 0, "Facility": 0, "Other": 0}
-
-    if os.path.exists(geojson_path):
-        with open(geojson_path, "r", encoding="utf-8") as f:
-            campus_geojson = json.load(f)
-
-        total_locations = len(campus_geojson.get("features", []))
-        for feature in campus_geojson.get("features", []):
-            name = feature["properties"].get("name", "").lower()
-            if "faculty" in name:
-                categories["Faculty"] += 1
-            elif any(x in name for x in ["cafe", "restaurant", "restoran", "bistro"]):
-                categories["Food"] += 1
-            elif any(x in name for x in ["hall", "library", "surau", "stad", "office", "building", "complex"]):
-                categories["Facility"] += 1
-            else:
-                categories["Other"] += 1
+    campus_geojson = place_store.geojson()
+    total_locations = len(campus_geojson.get("features", []))
+    categories = place_store.categories()
 
     # -------------------
     # 2️⃣ Most visited locations
     # -------------------
     most_visited = (
-        db.session.query(Location.name, func.count(Visit.id).label("visits"))
-        .join(Visit)
+        db.session.query(Location.name, func.sum(DailyLocationVisits.visits).label("visits"))
+        .join(DailyLocationVisits)
         .group_by(Location.id)
-        .order_by(func.count(Visit.id).desc())
+        .order_by(func.sum(DailyLocationVisits.visits).desc())
         .all()
     )
 
@@ -236,9 +217,8 @@ def analytics():
     # 4️⃣ Page views today
     # -------------------
     pageviews_today = (
-        db.session.query(PageView.page, func.count(PageView.id).label("views"))
-            .filter(PageView.view_date == today)
-        .group_by(PageView.page)
+        db.session.query(DailyPageViews.page, DailyPageViews.views)
+        .filter(DailyPageViews.day == today)
         .all()
     )
 
@@ -268,60 +248,54 @@ def log_visit():
     if not location_name:
         return jsonify({"error": "No location provided"}), 400
 
-    # find or create the location in DB
-    location = Location.query.filter_by(name=location_name).first()
-    if not location:
-        location = Location(name=location_name)
-        db.session.add(location)
-        db.session.commit()
+    log_visits([{"location": location_name}], user_id=_visitor_id())
+    return jsonify({"message": "Visit logged"}), 200
 
-    # log visit
-    visit = Visit(user_id=current_user.id if current_user.is_authenticated else None,
-                  location_id=location.id,
-                  timestamp=datetime.utcnow())
-    db.session.add(visit)
-    db.session.commit()
 
-    return jsonify({"message": "Visit logged"}), 200
+@admin_bp.route("/log_visits", methods=["POST"])
+def log_visits_batch():
+    """Batch of visits queued by the map page, usually sent with navigator.sendBeacon.
+
+    Accepts {"visits": [{"location": name, "ts": epoch_ms}, ...]} or a bare list.
+    """
+    # sendBeacon may not label the body as JSON
+    data = request.get_json(force=True, silent=True)
+    events = data.get("visits") if isinstance(data, dict) else data
+    if not isinstance(events, list):
+        return jsonify({"error": "Expected a JSON list of visits"}), 400
+    if len(events) > MAX_VISIT_BATCH:
+        return jsonify({"error": f"At most {MAX_VISIT_BATCH} visits per request"}), 413
+
+    logged = log_visits(events, user_id=_visitor_id())
+    return jsonify({"message": "Visits logged", "logged": logged}), 200
+
+
+def _visitor_id():
+    return current_user.id if current_user.is_authenticated else None
 
 @admin_bp.route("/locations", methods=["GET", "POST"])
 def edit_locations():
     if request.method == "POST":
-        # Save updated GeoJSON from frontend
-        updated_geojson = request.json
-        with open(GEOJSON_PATH, "w", encoding="utf-8") as f:
-            json.dump(updated_geojson, f, indent=2)
+        # Save updated GeoJSON from frontend (also refreshes the in-memory copy)
+        place_store.save(request.json)
         return {"status": "success"}
 
-    # GET: load locations from file
-    if os.path.exists(GEOJSON_PATH):
-        with open(GEOJSON_PATH, "r", encoding="utf-8") as f:
-            geojson_data = json.load(f)
-    else:
-        geojson_data = {"type": "FeatureCollection", "features": []}
-
-    return render_template("edit_locations.html", locations=geojson_data)
+    # GET: locations come from the shared place store
+    return render_template("edit_locations.html", locations=place_store.geojson())
 
 @admin_bp.route("/import_locations", methods=["POST"])
 @admin_required
 def import_locations():
-    with open(GEOJSON_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    count = 0
-    for feature in data.get("features", []):
-        name = feature["properties"].get("name")
-        category = feature["properties"].get("category", "Other")
-        coords = feature.get("geometry", {}).get("coordinates", None)
-
-        if not name or not coords:
-            continue
-
-        longitude, latitude = coords
-        if not Location.query.filter_by(name=name).first():
-            db.session.add(Location(name=name, category=category, latitude=latitude, longitude=longitude))
-            count += 1
-
+    result = import_features(place_store.features())
     db.session.commit()
-    flash(f"Imported {count} new locations from GeoJSON!", "success")
+
+    changed = result["added"] + result["updated"]
+    if changed:
+        for location in changed_locations(changed):
+            place_index.upsert_location(location)
+    flash(
+        f"Imported locations from GeoJSON: {len(result['added'])} added, "
+        f"{len(result['updated'])} updated, {result['unchanged']} unchanged.",
+        "success",
+    )
     return redirect(url_for("admin.edit_locations"))
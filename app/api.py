@@ -0,0 +1,133 @@
+# api.py
+import math
+
+from flask import Blueprint, request, jsonify
+from app import campus_graph, place_index, place_store, route_table
+from .route_table import place_point
+from .venues import parse_venue_codes
+
+MAX_VENUE_BATCH = 1000
+MAX_NEAREST = 50
+MAX_RADIUS_M = 5000
+
+api_bp = Blueprint("api", __name__, url_prefix="/api")
+
+
+def parse_latlng(value):
+    """Parse a "lat,lng" query value, returning (lat, lng) or None."""
+    try:
+        lat, lng = (float(part) for part in value.split(","))
+    except (AttributeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+# -------------------
+# ROUTING
+# -------------------
+def parse_endpoint(value):
+    """Resolve a route endpoint given as "lat,lng" or a place name/alias.
+
+    Returns ((lat, lng), place_name) -- place_name is None for raw
+    coordinates -- or (None, None) if it can't be resolved.
+    """
+    point = parse_latlng(value)
+    if point:
+        return point, None
+    name = route_table.canonical_name(value) if value else None
+    if name is None:
+        return None, None
+    return place_point(place_store.find(name)), name
+
+
+@api_bp.route("/route")
+def route():
+    start, origin = parse_endpoint(request.args.get("from"))
+    end, destination = parse_endpoint(request.args.get("to"))
+    if not start or not end:
+        return jsonify({"error": "from and to must be given as lat,lng or a place name"}), 400
+
+    # place to place: served straight from the precomputed table
+    result = route_table.lookup(origin, destination) if origin and destination else None
+    if result is None:
+        result = campus_graph.route(start, end)
+    if result is None:
+        return jsonify({"error": "No nearby path found"}), 404
+
+    return jsonify(result)
+
+
+@api_bp.route("/paths")
+def paths():
+    """The walking network for the map, compactly encoded (see CampusGraph.network)."""
+    campus_graph.refresh_if_changed()
+    payload, etag = campus_graph.network()
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
+
+
+# -------------------
+# NEARBY PLACES
+# -------------------
+def _query_point():
+    try:
+        lat = float(request.args["lat"])
+        lng = float(request.args["lng"])
+    except (KeyError, ValueError):
+        return None
+    if not (math.isfinite(lat) and math.isfinite(lng)):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+def _places_json(results):
+    return jsonify({
+        "places": [dict(payload, distance=round(distance, 1)) for distance, payload in results]
+    })
+
+
+@api_bp.route("/places/nearest")
+def nearest_places():
+    point = _query_point()
+    if not point:
+        return jsonify({"error": "lat and lng are required"}), 400
+    k = min(max(request.args.get("k", 5, type=int), 1), MAX_NEAREST)
+    return _places_json(place_index.nearest(*point, k=k))
+
+
+@api_bp.route("/places/within")
+def places_within():
+    point = _query_point()
+    radius = request.args.get("radius", type=float)
+    if not point or radius is None or not math.isfinite(radius) or radius < 0:
+        return jsonify({"error": "lat, lng and a radius in metres are required"}), 400
+    return _places_json(place_index.within(*point, min(radius, MAX_RADIUS_M)))
+
+
+# -------------------
+# VENUE CODES
+# -------------------
+@api_bp.route("/venues/parse", methods=["POST"])
+def parse_venues():
+    """Parse a batch of venue codes, e.g. a whole timetable.
+
+    Accepts {"codes": [...]} (or a bare JSON list) and returns the parsed
+    venues in the same order, with null for codes that can't be parsed.
+    """
+    data = request.get_json(silent=True)
+    codes = data.get("codes") if isinstance(data, dict) else data
+    if not isinstance(codes, list):
+        return jsonify({"error": "Expected a JSON list of venue codes"}), 400
+    if len(codes) > MAX_VENUE_BATCH:
+        return jsonify({"error": f"At most {MAX_VENUE_BATCH} codes per request"}), 413
+
+    results = parse_venue_codes(codes)
+    return jsonify({
+        "results": [{"code": code, "venue": venue} for code, venue in zip(codes, results)]
+    })
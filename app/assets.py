@@ -0,0 +1,161 @@
+# assets.py
+"""
+Build-free static asset pipeline.
+
+Files in the static folder are also served from ``/assets/``:
+
+* ``asset_url("style.css")`` (a template global) gives a fingerprinted URL
+  such as ``/assets/style.3f2a1b9c0d4e.css``. The fingerprint is a hash
+  of the file's content, so those responses are marked immutable and
+  cached for ASSET_MAX_AGE; editing the file changes the URL.
+* Plain ``/assets/<file>`` URLs (the GeoJSON data, images referenced from
+  CSS, stale fingerprints) get an ETag and ``Cache-Control: no-cache``, so
+  browsers revalidate and get a 304 when nothing changed.
+
+Text assets are sent gzip- or brotli-compressed when the client accepts
+it (brotli only if the ``brotli`` package is installed). Each variant is
+compressed once, on the first request that needs it, and kept in
+ASSET_CACHE_DIR under the file's content hash.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+from flask import Response, abort, request, send_file, url_for
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+DIGEST_LENGTH = 12
+FINGERPRINT = re.compile(r"^(?P<stem>.+)\.(?P<digest>[0-9a-f]{%d})(?P<ext>\.[^./]+)$" % DIGEST_LENGTH)
+COMPRESSIBLE = {".js", ".css", ".json", ".geojson", ".svg", ".html", ".txt", ".map"}
+MIMETYPES = {".geojson": "application/geo+json"}
+
+
+class AssetPipeline:
+
+    def __init__(self):
+        self.root = None
+        self.cache_dir = None
+        self.max_age = 31536000
+        self.min_size = 512
+        self._digests = {}  # path -> ((mtime_ns, size), digest)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.root = app.static_folder
+        self.cache_dir = app.config.setdefault(
+            "ASSET_CACHE_DIR", os.path.join(app.instance_path, "assets")
+        )
+        self.max_age = int(app.config.setdefault("ASSET_MAX_AGE", 31536000))
+        self.min_size = int(app.config.setdefault("ASSET_COMPRESS_MIN_SIZE", 512))
+        app.add_url_rule("/assets/<path:filename>", endpoint="assets", view_func=self.serve)
+        app.add_template_global(self.url, name="asset_url")
+        app.extensions["assets"] = self
+
+    # -------------------
+    # Fingerprints
+    # -------------------
+    def _path(self, filename):
+        path = safe_join(self.root, filename)
+        if path is None or not os.path.isfile(path):
+            return None
+        return path
+
+    def digest(self, path):
+        """Content hash of ``path``, recomputed only when its mtime or size changes."""
+        st = os.stat(path)
+        signature = (st.st_mtime_ns, st.st_size)
+        cached = self._digests.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:DIGEST_LENGTH]
+        with self._lock:
+            self._digests[path] = (signature, digest)
+        return digest
+
+    def url(self, filename):
+        """Fingerprinted URL for a static file (the plain one if it doesn't exist)."""
+        path = self._path(filename)
+        if path is None:
+            return url_for("assets", filename=filename)
+        stem, ext = os.path.splitext(filename)
+        return url_for("assets", filename=f"{stem}.{self.digest(path)}{ext}")
+
+    # -------------------
+    # Compressed variants
+    # -------------------
+    def _encoding(self, filename, size):
+        if os.path.splitext(filename)[1] not in COMPRESSIBLE or size < self.min_size:
+            return None
+        accepted = request.accept_encodings
+        if brotli is not None and accepted["br"]:
+            return "br"
+        if accepted["gzip"]:
+            return "gzip"
+        return None
+
+    def _variant(self, path, filename, digest, encoding):
+        """Path of the compressed copy, creating it on first use."""
+        suffix = ".br" if encoding == "br" else ".gz"
+        target = os.path.join(self.cache_dir, digest, filename + suffix)
+        if os.path.exists(target):
+            return target
+        with open(path, "rb") as f:
+            data = f.read()
+        if encoding == "br":
+            data = brotli.compress(data, quality=11)
+        else:
+            data = gzip.compress(data, compresslevel=9, mtime=0)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # concurrent first requests each write their own temp file; the last rename wins
+        tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, target)
+        return target
+
+    # -------------------
+    # Serving
+    # -------------------
+    def serve(self, filename):
+        immutable = False
+        path = self._path(filename)
+        if path is None:
+            match = FINGERPRINT.match(filename)
+            if match:
+                filename = match.group("stem") + match.group("ext")
+                path = self._path(filename)
+                if path is not None:
+                    # a stale fingerprint still gets the current file, just not cached forever
+                    immutable = self.digest(path) == match.group("digest")
+        if path is None:
+            abort(404)
+
+        digest = self.digest(path)
+        encoding = self._encoding(filename, os.path.getsize(path))
+        etag = f"{digest}-{encoding}" if encoding else digest
+        cache_control = (
+            f"public, max-age={self.max_age}, immutable" if immutable else "no-cache"
+        )
+
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            ext = os.path.splitext(filename)[1]
+            mimetype = MIMETYPES.get(ext) or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            source = self._variant(path, filename, digest, encoding) if encoding else path
+            response = send_file(source, mimetype=mimetype, etag=False, conditional=False, max_age=None)
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = cache_control
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
@@ -1,22 +1,18 @@
 from flask import Blueprint, render_template, redirect, url_for, request, flash
 from flask_login import login_user, logout_user, login_required, current_user, UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 from itsdangerous import BadSignature, SignatureExpired
 from flask_dance.contrib.google import google
-from app import db, login_manager, serializer
+from app import db, serializer
 from .models import User
+from .passwords import hash_password, verify_password
 from .email_utils import send_email
+from .rollups import record_signup
 import secrets
 
 # Create a Blueprint for authentication
 auth_bp = Blueprint("auth", __name__)
 
 # Flask-Login user loader
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
-
-
 # ------------------------
 # Routes
 # ------------------------
@@ -52,9 +48,10 @@ def register():
             return redirect(url_for("auth.register"))
 
         # Save user with hashed password
-        hashed_password = generate_password_hash(password, method="pbkdf2:sha256")
+        hashed_password = hash_password(password)
         new_user = User(name=name, email=email, username=username, password=hashed_password)
         db.session.add(new_user)
+        record_signup()
         db.session.commit()
 
         flash("Account created! You can now log in.", "success")
@@ -73,7 +70,9 @@ def login():
 
         user = User.query.filter_by(username=username).first()
 
-        if user and check_password_hash(user.password, password):
+        if user and verify_password(user, password):
+            if db.session.is_modified(user):
+                db.session.commit()  # hash upgraded to the current policy
             login_user(user, remember=remember)
             flash("Login successful!", "success")
 
@@ -107,7 +106,7 @@ def change_password():
         new_pw = request.form.get("new_password")
         confirm_pw = request.form.get("confirm_password")
 
-        if not check_password_hash(current_user.password, current_pw):
+        if not verify_password(current_user, current_pw):
             flash("Current password is incorrect.", "danger")
             return redirect(url_for("auth.change_password"))
 
@@ -115,7 +114,7 @@ def change_password():
             flash("New passwords do not match.", "danger")
             return redirect(url_for("auth.change_password"))
 
-        current_user.password = generate_password_hash(new_pw, method="pbkdf2:sha256")
+        current_user.password = hash_password(new_pw)
         db.session.commit()
 
         flash("Your password has been updated!", "success")
@@ -161,7 +160,7 @@ def reset_password(token):
             flash("Passwords do not match.", "danger")
             return redirect(request.url)
 
-        user.password = generate_password_hash(new_pw, method="pbkdf2:sha256")
+        user.password = hash_password(new_pw)
         db.session.commit()
 
         flash("Your password has been reset. Please login.", "success")
@@ -224,9 +223,10 @@ def google_login():
             name=name,
             email=email,
             username=email,
-            password=generate_password_hash(secrets.token_hex(16), method="pbkdf2:sha256")
+            password=hash_password(secrets.token_hex(16))
         )
         db.session.add(new_user)
+        record_signup()
         db.session.commit()
         user = new_user
 
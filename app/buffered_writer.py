@@ -0,0 +1,217 @@
+# buffered_writer.py
+"""
+In-process buffered writer.
+
+Rows are queued in memory by request handlers and bulk-inserted by a single
+background thread once ``batch_size`` rows are waiting or ``flush_interval``
+seconds have passed, so requests no longer pay for a commit each. A batch
+whose insert fails (e.g. "database is locked" under write contention) is
+retried ``max_retries`` times with exponential backoff before its rows are
+counted as failed.
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+
+from sqlalchemy import insert
+
+
+class _TrackingQueue(queue.Queue):
+    """Queue that remembers rows handed to the worker until they are written.
+
+    ``taken`` is updated under the queue's own mutex in the same step as the
+    get, so a row is always visible in exactly one of ``queue``/``taken``
+    until ``done_writing`` removes it.
+    """
+
+    def _init(self, maxsize):
+        super()._init(maxsize)
+        self.taken = []
+
+    def _get(self):
+        row = super()._get()
+        self.taken.append(row)
+        return row
+
+    def done_writing(self, batch):
+        written = {id(row) for row in batch}
+        with self.mutex:
+            self.taken = [row for row in self.taken if id(row) not in written]
+
+    def snapshot(self):
+        with self.mutex:
+            return self.taken + list(self.queue)
+
+
+class BufferedWriter:
+    """Bounded queue of row dicts flushed to one table with bulk INSERTs.
+
+    ``policy`` decides what happens when the queue is full: ``"drop"``
+    discards the new row straight away, ``"block"`` waits up to
+    ``block_timeout`` seconds for space before dropping it. ``on_flush`` is
+    called with each batch inside the insert transaction, e.g. to bump
+    rollup counters.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.model = None
+        self.on_flush = None
+        self.batch_size = 200
+        self.flush_interval = 2.0
+        self.policy = "drop"
+        self.block_timeout = 0.5
+        self.max_retries = 3
+        self.retry_delay = 0.5
+
+        self.queued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def init_app(self, app, model, prefix, on_flush=None):
+        """Bind to ``model`` and read ``<prefix>_*`` settings from app.config."""
+        self.app = app
+        self.model = model
+        self.on_flush = on_flush
+        self.batch_size = int(app.config.setdefault(f"{prefix}_BATCH_SIZE", 200))
+        self.flush_interval = float(app.config.setdefault(f"{prefix}_FLUSH_INTERVAL", 2.0))
+        self.policy = app.config.setdefault(f"{prefix}_QUEUE_POLICY", "drop")
+        self.block_timeout = float(app.config.setdefault(f"{prefix}_BLOCK_TIMEOUT", 0.5))
+        self.max_retries = int(app.config.setdefault(f"{prefix}_WRITE_RETRIES", 3))
+        max_queue = int(app.config.setdefault(f"{prefix}_QUEUE_SIZE", 10000))
+
+        if self.policy not in ("drop", "block"):
+            raise ValueError(f"{prefix}_QUEUE_POLICY must be 'drop' or 'block'")
+
+        self._queue = _TrackingQueue(maxsize=max_queue)
+        atexit.register(self.stop)
+
+    # -------------------
+    # Producer side
+    # -------------------
+    def enqueue(self, row):
+        """Queue one row (a dict of column values). Returns False if dropped."""
+        self._ensure_worker()
+        try:
+            if self.policy == "block":
+                self._queue.put(row, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.queued += 1
+        return True
+
+    def pending(self):
+        """Rows accepted but not committed yet, oldest first."""
+        return self._queue.snapshot() if self._queue else []
+
+    def stats(self):
+        return {
+            "queued": self.queued,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "pending": self._queue.qsize() if self._queue else 0,
+        }
+
+    # -------------------
+    # Worker side
+    # -------------------
+    def _ensure_worker(self):
+        # threads don't survive a fork, so each worker process starts its own
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"{self.model.__name__}Writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+
+    def _collect(self):
+        """Block until a full batch is waiting or the flush interval passes."""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _write(self, batch):
+        from . import db
+
+        name = self.model.__name__
+        with self._flush_lock, self.app.app_context():
+            try:
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        db.session.execute(insert(self.model), batch)
+                        if self.on_flush:
+                            self.on_flush(batch)
+                        db.session.commit()
+                        break
+                    except Exception as e:
+                        db.session.rollback()
+                        if attempt < self.max_retries:
+                            self.app.logger.warning("%s batch insert failed (%d rows), retrying: %s",
+                                                    name, len(batch), e)
+                            time.sleep(self.retry_delay * 2 ** attempt)
+                            continue
+                        with self._lock:
+                            self.failed += len(batch)
+                        self.app.logger.warning("%s batch insert failed (%d rows) after %d attempts: %s",
+                                                name, len(batch), attempt + 1, e)
+                        return
+            finally:
+                self._queue.done_writing(batch)
+        with self._lock:
+            self.flushed += len(batch)
+
+    def flush(self):
+        """Write everything currently queued from the calling thread."""
+        if self._queue is None:
+            return
+        batch = self._drain()
+        for i in range(0, len(batch), self.batch_size):
+            self._write(batch[i:i + self.batch_size])
+
+    def stop(self):
+        """Stop the worker and flush whatever is left (runs at interpreter exit)."""
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
@@ -0,0 +1,150 @@
+# chat_cache.py
+"""
+Response cache for the Gemini-backed /chat endpoint.
+
+Answers are keyed on the normalised message plus the hour-of-week bucket
+the prompt's "current time" falls in, so repeated questions ("food now?",
+"where is the library") skip the model call entirely. Two backends are
+available: an in-process LRU dict and a small SQLite file that survives
+restarts and is shared by every worker on the host.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from .memory_cache import MemoryBackend
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalise_message(message):
+    """Lower-case, drop punctuation and collapse whitespace."""
+    message = _NON_WORD.sub(" ", message.lower())
+    return _SPACES.sub(" ", message).strip()
+
+
+def time_bucket(when=None):
+    """The part of the prompt's time context answers depend on: day + hour."""
+    return (when or datetime.now()).strftime("%A %H")
+
+
+def make_key(message, when=None):
+    raw = f"{time_bucket(when)}|{normalise_message(message)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# -------------------
+# Backends
+# -------------------
+class SQLiteBackend:
+    """LRU cache in a SQLite file, shared by all workers on the host."""
+
+    def __init__(self, path, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_chat_cache_last_used ON chat_cache (last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM chat_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM chat_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE chat_cache SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chat_cache (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now),
+            )
+            self._conn.execute("DELETE FROM chat_cache WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                "DELETE FROM chat_cache WHERE key IN ("
+                " SELECT key FROM chat_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chat_cache").fetchone()[0]
+
+
+# -------------------
+# Cache front
+# -------------------
+class ChatCache:
+    """Pick a backend from app.config and count hits and misses."""
+
+    def __init__(self):
+        self.backend = None
+        self.ttl = 3600
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        kind = app.config.setdefault("CHAT_CACHE_BACKEND", "memory")
+        self.ttl = int(app.config.setdefault("CHAT_CACHE_TTL", 3600))
+        max_entries = int(app.config.setdefault("CHAT_CACHE_MAX_ENTRIES", 1000))
+
+        if kind == "memory":
+            self.backend = MemoryBackend(max_entries)
+        elif kind == "sqlite":
+            os.makedirs(app.instance_path, exist_ok=True)
+            path = app.config.setdefault(
+                "CHAT_CACHE_PATH", os.path.join(app.instance_path, "chat_cache.db")
+            )
+            self.backend = SQLiteBackend(path, max_entries)
+        elif kind == "none":
+            self.backend = None
+        else:
+            raise ValueError("CHAT_CACHE_BACKEND must be 'memory', 'sqlite' or 'none'")
+
+    def get(self, message, when=None):
+        if self.backend is None:
+            return None
+        value = self.backend.get(make_key(message, when))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, message, value, when=None):
+        if self.backend is not None:
+            self.backend.set(make_key(message, when), value, self.ttl)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "entries": len(self.backend) if self.backend else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,155 @@
+# cli.py
+"""Maintenance commands, run with ``flask --app app.app <command>``."""
+from datetime import date, timedelta
+
+import click
+
+
+def register_commands(app):
+
+    @app.cli.command("init-db")
+    @click.option("--skip-route-table", is_flag=True, help="Leave the route table to the first lookup.")
+    def init_db(skip_route_table):
+        """Create or upgrade the schema, the default admin and the derived tables.
+
+        Safe to run on every deploy; workers no longer do this at start-up.
+        """
+        from flask_migrate import upgrade
+
+        from app import db, route_table
+        from .models import User
+        from .passwords import hash_password
+        from .rollups import backfill_if_empty
+
+        db.create_all()
+        # stamps new databases and brings old ones up to date (the revisions are idempotent)
+        upgrade()
+
+        # only hash when creating the admin; an existing admin keeps its password
+        existing_admin = User.query.filter_by(username="admin").first()
+        if existing_admin:
+            existing_admin.name = "Administrator"
+            existing_admin.email = "admin@example.com"
+            existing_admin.role = "admin"
+            if db.session.is_modified(existing_admin):
+                db.session.commit()
+                click.echo("✅ Admin user updated")
+        else:
+            default_admin = User(
+                name="Administrator",
+                username="admin",
+                email="admin@example.com",
+                password=hash_password("admin123"),
+                role="admin"
+            )
+            db.session.add(default_admin)
+            db.session.commit()
+            click.echo("✅ Admin user created")
+
+        backfill_if_empty()
+
+        if not skip_route_table:
+            route_table.ensure_fresh()
+        click.echo("✅ Database ready")
+
+    @app.cli.command("rebuild-rollups")
+    @click.option("--days", type=int, default=None,
+                  help="Only recompute the last N days (default: everything).")
+    def rebuild_rollups(days):
+        """Recompute the daily analytics rollups from the raw event tables."""
+        from .rollups import rebuild
+
+        start = date.today() - timedelta(days=days - 1) if days else None
+        rebuild(start=start)
+        click.echo("✅ Rollups rebuilt" + (f" for the last {days} days" if days else ""))
+
+    @app.cli.command("archive-events")
+    @click.option("--days", type=int, default=None,
+                  help="Keep this many days in the database (default: RETENTION_DAYS).")
+    @click.option("--dry-run", is_flag=True, help="Only report what would be archived.")
+    def archive_events(days, dry_run):
+        """Move old pageviews and visits into monthly CSV.gz archives."""
+        from .retention import archive_old_events
+
+        moved = archive_old_events(app, days=days, dry_run=dry_run)
+        for (table, month), count in sorted(moved.items()):
+            click.echo(f"{'Would archive' if dry_run else 'Archived'} {count} {table} rows from {month:%Y-%m}")
+        if not moved:
+            click.echo("Nothing to archive")
+
+    @app.cli.command("archive-report")
+    @click.argument("table", type=click.Choice(["page_view", "visit"]))
+    @click.option("--group-by", default=None, help="Column to count by, e.g. page or location_id.")
+    @click.option("--start", type=click.DateTime(["%Y-%m-%d"]), default=None)
+    @click.option("--end", type=click.DateTime(["%Y-%m-%d"]), default=None)
+    def archive_report(table, group_by, start, end):
+        """Count archived rows, optionally grouped by a column."""
+        from .retention import ARCHIVED_TABLES, ArchiveReader, archive_dir
+
+        if group_by and group_by not in ARCHIVED_TABLES[table][0].__table__.columns:
+            raise click.BadParameter(f"{table} has no column {group_by!r}", param_hint="--group-by")
+        reader = ArchiveReader(archive_dir(app))
+        start = start.date() if start else None
+        end = end.date() if end else None
+        if group_by:
+            for value, count in reader.count_by(table, group_by, start, end).most_common():
+                click.echo(f"{count:>8}  {value}")
+        else:
+            click.echo(sum(1 for _ in reader.rows(table, start, end)))
+
+    @app.cli.command("send-outbox")
+    def send_outbox():
+        """Deliver every queued email that is due, then exit."""
+        from app import email_outbox
+
+        sent = email_outbox.deliver_all()
+        click.echo(f"✅ Sent {sent} emails" if sent else "Nothing to send")
+
+    @app.cli.command("build-route-table")
+    def build_route_table():
+        """Precompute the routes between all named campus places."""
+        from app import route_table
+
+        route_table.ensure_fresh(force=True)
+        click.echo(f"✅ Route table ready: {route_table.stats()['routes']} routes")
+
+    @app.cli.command("graph-report")
+    @click.option("--tolerance", type=float, default=None,
+                  help="Snap tolerance in metres to try (default: CAMPUS_SNAP_TOLERANCE_M).")
+    def graph_report(tolerance):
+        """Repair and simplify campus_paths.geojson and report what changed."""
+        from app import campus_graph
+        from .routing import CampusGraph
+
+        graph = campus_graph
+        if tolerance is not None:
+            graph = CampusGraph(snap_tolerance=tolerance)
+            graph.load(campus_graph.path)
+        else:
+            graph.ensure_loaded()
+        graph.wait_for_landmarks()
+
+        for key, value in graph.report.items():
+            click.echo(f"{key:>18}: {value}")
+        for problem in graph.problems:
+            click.echo(f"⚠️ {problem}")
+        if graph.problems:
+            raise click.ClickException(f"{len(graph.problems)} problems in the path network")
+
+    @app.cli.command("explain-queries")
+    def explain_queries():
+        """Show the SQLite plans of the analytics hot queries; fail on full scans."""
+        from app import db
+        from .query_plans import check_hot_queries
+
+        if db.engine.dialect.name != "sqlite":
+            raise click.ClickException("explain-queries only understands SQLite plans")
+
+        failed = 0
+        for label, plan, scans in check_hot_queries():
+            click.echo(f"{'❌' if scans else '✅'} {label}")
+            for line in plan:
+                click.echo(f"     {line}")
+            failed += bool(scans)
+        if failed:
+            raise click.ClickException(f"{failed} hot queries do a full table scan")
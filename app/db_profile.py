@@ -0,0 +1,91 @@
+# db_profile.py
+"""
+Database connection profile.
+
+DATABASE_URL overrides the default SQLite file (e.g. to point at a local
+Postgres). For SQLite, every pooled connection gets the pragmas of the
+selected SQLITE_PROFILE when it is opened: "wal" (the default) lets
+readers and the background writers work alongside each other, while
+"default" leaves SQLite's rollback journal settings untouched.
+"""
+from sqlalchemy import event
+
+DEFAULT_DATABASE_URI = "sqlite:///database.db"
+
+SQLITE_PROFILES = {
+    "default": {},  # rollback journal, synchronous=FULL
+    "wal": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",     # safe with WAL; fsync on checkpoint only
+        "busy_timeout": 5000,        # ms to wait for the write lock before "database is locked"
+        "mmap_size": 268435456,      # 256 MiB of memory-mapped reads
+        "cache_size": -20000,        # ~20 MB page cache (negative = KiB)
+        "temp_store": "MEMORY",
+    },
+}
+
+# config key -> pragma, for overriding single values of a profile
+PRAGMA_OVERRIDES = {
+    "SQLITE_BUSY_TIMEOUT_MS": "busy_timeout",
+    "SQLITE_MMAP_SIZE": "mmap_size",
+    "SQLITE_CACHE_SIZE": "cache_size",
+}
+
+
+def database_uri(url=None):
+    """Normalise a DATABASE_URL, falling back to the local SQLite file."""
+    if not url:
+        return DEFAULT_DATABASE_URI
+    if url.startswith("postgres://"):  # Heroku/Render style
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def _is_memory_sqlite(uri):
+    return uri in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in uri
+
+
+def engine_options(uri, pool_size=5, max_overflow=10):
+    if uri.startswith("sqlite"):
+        options = {"connect_args": {"check_same_thread": False}}
+        # in-memory databases get a StaticPool/SingletonThreadPool, which takes no sizing
+        if not _is_memory_sqlite(uri):
+            options.update(pool_size=pool_size, max_overflow=max_overflow)
+        return options
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+    }
+
+
+def sqlite_pragmas(config):
+    """Pragmas for the configured SQLITE_PROFILE, with per-key overrides."""
+    profile = config.get("SQLITE_PROFILE", "wal")
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLITE_PROFILE {profile!r}, expected one of {sorted(SQLITE_PROFILES)}")
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for key, pragma in PRAGMA_OVERRIDES.items():
+        if config.get(key) is not None:
+            pragmas[pragma] = int(config[key])
+    return pragmas
+
+
+def install_sqlite_pragmas(engine, pragmas):
+    """Run ``pragmas`` on every new DBAPI connection of ``engine``."""
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def init_database(app, db):
+    """Hook the SQLite profile onto the app's engine (call after db.init_app)."""
+    with app.app_context():
+        install_sqlite_pragmas(db.engine, sqlite_pragmas(app.config))
@@ -0,0 +1,276 @@
+# email_outbox.py
+"""
+Persistent outbox for outgoing email.
+
+``send_email`` only inserts an OutboxEmail row; a background thread per
+process claims due rows and delivers them through the configured
+transport, keeping one SMTP connection open for everything it finds in a
+pass. Failed sends are retried with exponential backoff until
+OUTBOX_MAX_ATTEMPTS, then marked failed. Rows survive restarts, and a row
+stuck in "sending" by a crashed worker is picked up again after
+OUTBOX_STALE_AFTER seconds.
+
+Transports (MAIL_TRANSPORT):
+  smtp  Flask-Mail with the MAIL_* settings (point MAIL_SERVER/MAIL_PORT at a
+        local debugging server such as ``python -m aiosmtpd -n`` for testing)
+  file  write each message as an .eml file into MAIL_FILE_DIR
+"""
+import atexit
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from flask_mail import Message
+from sqlalchemy import func, update
+
+MARK_SENT_ATTEMPTS = 3
+
+
+class SMTPTransport:
+    """Flask-Mail over SMTP; one connection per delivery pass."""
+
+    def __init__(self, mail):
+        self.mail = mail
+
+    @contextmanager
+    def session(self):
+        with self.mail.connect() as connection:
+            yield connection.send
+
+
+class FileTransport:
+    """Writes messages to disk instead of sending them."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    @contextmanager
+    def session(self):
+        os.makedirs(self.directory, exist_ok=True)
+
+        def send(message):
+            name = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}.eml"
+            with open(os.path.join(self.directory, name), "wb") as f:
+                f.write(message.as_bytes())
+
+        yield send
+
+
+class EmailOutbox:
+
+    def __init__(self):
+        self.app = None
+        self.transport = None
+        self.poll_interval = 5.0
+        self.max_attempts = 5
+        self.backoff = 30.0
+        self.max_backoff = 3600.0
+        self.stale_after = 600.0
+        self.batch_size = 20
+
+        self.sent = 0
+        self.retried = 0
+
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    def init_app(self, app, mail):
+        self.app = app
+        kind = app.config.setdefault("MAIL_TRANSPORT", "smtp")
+        self.poll_interval = float(app.config.setdefault("OUTBOX_POLL_INTERVAL", 5.0))
+        self.max_attempts = int(app.config.setdefault("OUTBOX_MAX_ATTEMPTS", 5))
+        self.backoff = float(app.config.setdefault("OUTBOX_BACKOFF_SECONDS", 30.0))
+        self.stale_after = float(app.config.setdefault("OUTBOX_STALE_AFTER", 600.0))
+
+        if kind == "smtp":
+            self.transport = SMTPTransport(mail)
+        elif kind == "file":
+            self.transport = FileTransport(app.config.setdefault(
+                "MAIL_FILE_DIR", os.path.join(app.instance_path, "mail")
+            ))
+        else:
+            raise ValueError("MAIL_TRANSPORT must be 'smtp' or 'file'")
+
+        # deliver leftovers from a previous run once the app starts serving
+        app.before_request(self._ensure_worker)
+        atexit.register(self.stop)
+        app.extensions["email_outbox"] = self
+
+    # -------------------
+    # Producer side
+    # -------------------
+    def enqueue(self, to, subject, body):
+        """Store a message for delivery and wake the worker. Commits the session."""
+        from . import db
+        from .models import OutboxEmail
+
+        email = OutboxEmail(recipient=to, subject=subject, body=body)
+        db.session.add(email)
+        db.session.commit()
+        self._ensure_worker()
+        self._wake.set()
+        return email.id
+
+    def stats(self):
+        from . import db
+        from .models import OutboxEmail
+
+        counts = dict(
+            db.session.query(OutboxEmail.status, func.count(OutboxEmail.id))
+            .group_by(OutboxEmail.status)
+        )
+        return {
+            "pending": counts.get("pending", 0) + counts.get("sending", 0),
+            "failed": counts.get("failed", 0),
+            "sent": self.sent,
+            "retried": self.retried,
+        }
+
+    # -------------------
+    # Worker side
+    # -------------------
+    def _ensure_worker(self):
+        # threads don't survive a fork, so each worker process starts its own
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="EmailOutbox", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                delivered = self.deliver_due()
+            except Exception as e:
+                print(f"⚠️ Email outbox pass failed: {e}")
+                delivered = 0
+            if not delivered:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _claim(self):
+        """Mark up to batch_size due rows as "sending" for this worker and return them."""
+        from . import db
+        from .models import OutboxEmail
+
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=self.stale_after)
+        due = (
+            OutboxEmail.query
+            .filter(db.or_(
+                db.and_(OutboxEmail.status == "pending", OutboxEmail.next_attempt_at <= now),
+                db.and_(OutboxEmail.status == "sending", OutboxEmail.next_attempt_at <= stale),
+            ))
+            .order_by(OutboxEmail.next_attempt_at)
+            .limit(self.batch_size)
+            .all()
+        )
+        claimed = []
+        for email in due:
+            # only one process wins each row
+            result = db.session.execute(
+                update(OutboxEmail)
+                .where(OutboxEmail.id == email.id,
+                       OutboxEmail.status == email.status,
+                       OutboxEmail.next_attempt_at == email.next_attempt_at)
+                .values(status="sending", next_attempt_at=now)
+            )
+            if result.rowcount == 1:
+                claimed.append(email.id)
+        db.session.commit()
+        return [db.session.get(OutboxEmail, email_id) for email_id in claimed]
+
+    def _retry_later(self, email, error):
+        email.attempts += 1
+        email.last_error = str(error)[:500]
+        if email.attempts >= self.max_attempts:
+            email.status = "failed"
+            print(f"⚠️ Giving up on email {email.id} to {email.recipient}: {error}")
+        else:
+            delay = min(self.backoff * 2 ** (email.attempts - 1), self.max_backoff)
+            email.status = "pending"
+            email.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+            with self._lock:
+                self.retried += 1
+
+    def _mark_sent(self, email):
+        """Record a delivered email in its own commit.
+
+        Retried, because a row left "sending" is sent again by the stale-claim
+        recovery. Returns False if it still couldn't be recorded.
+        """
+        from . import db
+
+        email_id = email.id
+        for _ in range(MARK_SENT_ATTEMPTS):
+            try:
+                email.status = "sent"
+                email.sent_at = datetime.utcnow()
+                email.attempts += 1
+                db.session.commit()
+                return True
+            except Exception as e:
+                db.session.rollback()
+                error = e
+        print(f"⚠️ Email {email_id} was sent but couldn't be marked sent: {error}")
+        return False
+
+    def deliver_due(self):
+        """Send everything that is due over one transport session; returns how many were sent."""
+        from . import db
+
+        with self.app.app_context():
+            emails = self._claim()
+            if not emails:
+                return 0
+            delivered = 0
+            remaining = list(emails)
+            connected = False
+            try:
+                with self.transport.session() as send:
+                    connected = True
+                    while remaining:
+                        email = remaining[0]
+                        send(Message(email.subject, recipients=[email.recipient], body=email.body))
+                        remaining.pop(0)
+                        delivered += 1
+                        # bookkeeping errors are handled there, so only send errors get here
+                        self._mark_sent(email)
+            except Exception as e:
+                db.session.rollback()
+                # couldn't connect: everything backs off. Failed mid-session: the
+                # message being sent takes the blame, the rest go straight back.
+                blamed = remaining[:1] if connected else remaining
+                for email in blamed:
+                    self._retry_later(email, e)
+                for email in remaining[len(blamed):]:
+                    email.status = "pending"
+                db.session.commit()
+            with self._lock:
+                self.sent += delivered
+            return delivered
+
+    def deliver_all(self):
+        """Deliver everything currently due from the calling thread."""
+        total = 0
+        while True:
+            delivered = self.deliver_due()
+            total += delivered
+            if not delivered:
+                return total
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=5)
@@ -1,11 +1,10 @@
-from flask_mail import Message
-from . import mail
+from . import email_outbox
+
 
 def send_email(to, subject, body):
+    """Queue an email; the outbox worker delivers it in the background."""
     try:
-        msg = Message(subject, recipients=[to])
-        msg.body = body
-        mail.send(msg)
-        print(f"Email sent to {to}")
+        email_outbox.enqueue(to, subject, body)
+        print(f"Email queued for {to}")
     except Exception as e:
-        print(f"Error sending email: {e}")
+        print(f"Error queueing email: {e}")
@@ -0,0 +1,64 @@
+# gemini.py
+"""
+Lazily created Gemini client.
+
+Importing ``google.generativeai`` takes most of a worker's start-up time,
+so nothing is imported or configured until the first chat request needs
+a model. A missing GOOGLE_API_KEY no longer stops the app from starting:
+the chatbot raises on that first call and answers with its usual
+fallback, while every other page keeps working.
+"""
+import threading
+
+# Higher temperature / top_p / top_k for more creative, varied replies
+GENERATION_CONFIG = {
+    "temperature": 1.0,
+    "top_p": 0.95,
+    "top_k": 50,
+    "max_output_tokens": 500,
+}
+
+
+class GeminiClient:
+
+    def __init__(self):
+        self.api_key = None
+        self.model_name = "gemini-2.0-flash"
+        self.fallback_model_name = "gemini-1.5-flash"
+        self._model = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.api_key = app.config.setdefault("GOOGLE_API_KEY", None)
+        self.model_name = app.config.setdefault("GEMINI_MODEL", self.model_name)
+        self.fallback_model_name = app.config.setdefault("GEMINI_FALLBACK_MODEL", self.fallback_model_name)
+        app.extensions["gemini"] = self
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def model(self):
+        """The GenerativeModel, created on first use."""
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            if self._model is None:
+                self._model = self._create_model()
+        return self._model
+
+    def _create_model(self):
+        if not self.api_key:
+            raise RuntimeError("GOOGLE_API_KEY environment variable is required")
+
+        import google.generativeai as genai
+
+        genai.configure(api_key=self.api_key)
+        try:
+            return genai.GenerativeModel(model_name=self.model_name, generation_config=GENERATION_CONFIG)
+        except Exception as e:
+            print(f"{self.model_name} error: {e}. Falling back to {self.fallback_model_name}.")
+            return genai.GenerativeModel(model_name=self.fallback_model_name, generation_config=GENERATION_CONFIG)
+
+    def generate_content(self, *args, **kwargs):
+        return self.model().generate_content(*args, **kwargs)
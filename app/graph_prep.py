@@ -0,0 +1,387 @@
+# graph_prep.py
+"""
+Topology repair and simplification of the walking network.
+
+Hand-drawn path files rarely line up exactly: a path that is meant to end
+on another one stops half a metre short, two paths cross without a shared
+vertex, and long curves are drawn with dozens of vertices that routing
+doesn't care about. ``prepare_network`` turns the raw LineStrings into a
+clean routing graph in four steps:
+
+1. snap   vertices closer than ``tolerance`` metres are merged (greedily,
+          so no vertex moves more than ``tolerance``)
+2. split  a line ending within ``tolerance`` of another line's interior is
+          joined to it (T-junction), and crossing segments get a shared
+          vertex at the crossing
+3. check  zero-length and duplicate segments are dropped, connected
+          components are counted
+4. contract  chains of degree-2 vertices become one weighted edge between
+          junctions (vertices of any other degree), keeping the chain's
+          vertices as the edge geometry
+
+The full vertex/segment geometry is kept for snapping and drawing; only
+junctions and contracted edges are searched. ``SegmentGrid`` is also what
+CampusGraph uses to find the segment nearest to a route endpoint.
+"""
+import math
+from array import array
+
+from .routing import EARTH_RADIUS_M, haversine
+
+
+class Plane:
+    """Local equirectangular projection in metres (fine at campus scale)."""
+
+    def __init__(self, ref_lat):
+        self.kx = math.cos(math.radians(ref_lat))
+
+    def project(self, lat, lng):
+        return math.radians(lng) * EARTH_RADIUS_M * self.kx, math.radians(lat) * EARTH_RADIUS_M
+
+    def unproject(self, x, y):
+        return math.degrees(y / EARTH_RADIUS_M), math.degrees(x / (EARTH_RADIUS_M * self.kx))
+
+
+class _Snapper:
+    """Greedy vertex clustering on a grid with cells of ``tolerance`` metres."""
+
+    def __init__(self, tolerance):
+        self.tolerance = tolerance
+        self.cell = max(tolerance, 1e-6)
+        self.grid = {}
+        self.points = []  # (x, y) of each cluster's first point
+
+    def add(self, x, y):
+        """Cluster id for a point, and whether it moved onto a different point."""
+        cx, cy = int(math.floor(x / self.cell)), int(math.floor(y / self.cell))
+        best, best_d = None, math.inf
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                for vid in self.grid.get((gx, gy), ()):
+                    px, py = self.points[vid]
+                    d = math.hypot(px - x, py - y)
+                    if d < best_d:
+                        best, best_d = vid, d
+        if best is not None and (best_d <= self.tolerance or best_d == 0.0):
+            return best, best_d > 0.0
+        vid = len(self.points)
+        self.points.append((x, y))
+        self.grid.setdefault((cx, cy), []).append(vid)
+        return vid, False
+
+
+class SegmentGrid:
+    """Segments bucketed by the grid cells their (padded) bounding box covers."""
+
+    def __init__(self, points, segments, cell, pad=0.0):
+        self.cell = cell
+        self.points = points
+        self.segments = segments
+        self.grid = {}
+        for sid, (a, b) in enumerate(segments):
+            (ax, ay), (bx, by) = points[a], points[b]
+            for key in self._cells(min(ax, bx) - pad, min(ay, by) - pad, max(ax, bx) + pad, max(ay, by) + pad):
+                self.grid.setdefault(key, []).append(sid)
+        self.bounds = None  # (min_gx, min_gy, max_gx, max_gy) of the occupied cells
+        if self.grid:
+            xs = [key[0] for key in self.grid]
+            ys = [key[1] for key in self.grid]
+            self.bounds = (min(xs), min(ys), max(xs), max(ys))
+
+    def _cells(self, x0, y0, x1, y1):
+        c = self.cell
+        for gx in range(int(math.floor(x0 / c)), int(math.floor(x1 / c)) + 1):
+            for gy in range(int(math.floor(y0 / c)), int(math.floor(y1 / c)) + 1):
+                yield gx, gy
+
+    def near_point(self, x, y):
+        return set(self.grid.get((int(math.floor(x / self.cell)), int(math.floor(y / self.cell))), ()))
+
+    def _ring(self, cx, cy, r):
+        """Cells at Chebyshev distance ``r`` from (cx, cy), clipped to the bounds."""
+        x0, y0, x1, y1 = self.bounds
+        for gx in range(max(cx - r, x0), min(cx + r, x1) + 1):
+            for gy in ((cy - r, cy + r) if r else (cy,)):
+                if y0 <= gy <= y1:
+                    yield gx, gy
+        if r:
+            for gy in range(max(cy - r + 1, y0), min(cy + r - 1, y1) + 1):
+                for gx in (cx - r, cx + r):
+                    if x0 <= gx <= x1:
+                        yield gx, gy
+
+    def nearest(self, x, y):
+        """(segment id, t, distance) of the segment closest to (x, y), or None.
+
+        Looks at rings of cells around the point and stops once the next
+        ring can't hold anything closer than the best segment so far.
+        """
+        if self.bounds is None:
+            return None
+        c = self.cell
+        cx, cy = int(math.floor(x / c)), int(math.floor(y / c))
+        x0, y0, x1, y1 = self.bounds
+        r = max(x0 - cx, cx - x1, y0 - cy, cy - y1, 0)  # first ring that reaches an occupied cell
+        last = max(cx - x0, x1 - cx, cy - y0, y1 - cy)
+        best, best_t, best_d = None, 0.0, math.inf
+        seen = set()
+        while r <= last:
+            for key in self._ring(cx, cy, r):
+                for sid in self.grid.get(key, ()):
+                    if sid in seen:
+                        continue
+                    seen.add(sid)
+                    a, b = self.segments[sid]
+                    (ax, ay), (bx, by) = self.points[a], self.points[b]
+                    t, d = _project_onto(x, y, ax, ay, bx, by)
+                    if d < best_d:
+                        best, best_t, best_d = sid, t, d
+            # every segment not seen yet lies outside the rings searched so far
+            if best_d <= r * c:
+                break
+            r += 1
+        return best, best_t, best_d
+
+    def pairs(self):
+        seen = set()
+        for sids in self.grid.values():
+            for i in range(len(sids)):
+                for j in range(i + 1, len(sids)):
+                    pair = (sids[i], sids[j]) if sids[i] < sids[j] else (sids[j], sids[i])
+                    if pair not in seen:
+                        seen.add(pair)
+                        yield pair
+
+
+def _project_onto(px, py, ax, ay, bx, by):
+    """(t, distance) of point p projected onto segment a-b."""
+    dx, dy = bx - ax, by - ay
+    seg2 = dx * dx + dy * dy
+    t = 0.0 if seg2 == 0 else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / seg2))
+    return t, math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def _crossing(p1, p2, p3, p4):
+    """Parameters (s, u) where segments p1-p2 and p3-p4 properly cross, or None."""
+    d1x, d1y = p2[0] - p1[0], p2[1] - p1[1]
+    d2x, d2y = p4[0] - p3[0], p4[1] - p3[1]
+    denom = d1x * d2y - d1y * d2x
+    if denom == 0:
+        return None  # parallel or collinear: overlaps are left alone
+    ex, ey = p3[0] - p1[0], p3[1] - p1[1]
+    s = (ex * d2y - ey * d2x) / denom
+    u = (ex * d1y - ey * d1x) / denom
+    if 0 < s < 1 and 0 < u < 1:
+        return s, u
+    return None
+
+
+class PreparedNetwork:
+    """Output of ``prepare_network``.
+
+    ``lat``/``lng`` hold every kept vertex and ``segments`` the (a, b) vertex
+    pairs between them. ``junctions`` lists the vertices the router
+    searches and ``edges`` the contracted edges as ``(u, v, length, path)``
+    with ``path`` the vertex ids from u to v. ``report`` summarises what
+    was repaired.
+    """
+
+    def __init__(self, lat, lng, segments, junctions, edges, report):
+        self.lat = lat
+        self.lng = lng
+        self.segments = segments
+        self.junctions = junctions
+        self.edges = edges
+        self.report = report
+
+
+def prepare_network(lines, tolerance=1.0):
+    """Build a PreparedNetwork from LineStrings given as lists of (lng, lat)."""
+    lines = [line for line in lines if line]
+    raw_count = sum(len(line) for line in lines)
+    report = {
+        "lines": len(lines),
+        "input_vertices": raw_count,
+        "tolerance_m": tolerance,
+        "snapped_vertices": 0,
+        "t_junctions": 0,
+        "crossings": 0,
+        "dropped_segments": 0,
+    }
+    ref_lat = sum(c[1] for line in lines for c in line) / raw_count if raw_count else 0.0
+    plane = Plane(ref_lat)
+
+    # 1. snap
+    snapper = _Snapper(tolerance)
+    paths = []
+    for line in lines:
+        ids = []
+        for coord in line:
+            vid, moved = snapper.add(*plane.project(coord[1], coord[0]))
+            report["snapped_vertices"] += moved
+            if not ids or ids[-1] != vid:
+                ids.append(vid)
+        paths.append(ids)
+    points = snapper.points
+
+    segments = []
+    line_ends = set()
+    for ids in paths:
+        line_ends.update((ids[0], ids[-1]))
+        segments.extend(zip(ids, ids[1:]))
+
+    # 2. split at T-junctions and crossings
+    splits = {}  # segment id -> [(t, vertex)]
+    cell = max(25.0, 4 * tolerance)
+    seg_grid = SegmentGrid(points, segments, cell, tolerance)
+    for v in sorted(line_ends):
+        x, y = points[v]
+        for sid in seg_grid.near_point(x, y):
+            a, b = segments[sid]
+            if v in (a, b):
+                continue
+            (ax, ay), (bx, by) = points[a], points[b]
+            t, d = _project_onto(x, y, ax, ay, bx, by)
+            if d <= tolerance and math.hypot(x - ax, y - ay) > tolerance and math.hypot(x - bx, y - by) > tolerance:
+                splits.setdefault(sid, []).append((t, v))
+                report["t_junctions"] += 1
+
+    for i, j in seg_grid.pairs():
+        (a, b), (c, d) = segments[i], segments[j]
+        if len({a, b, c, d}) < 4:
+            continue
+        hit = _crossing(points[a], points[b], points[c], points[d])
+        if hit is None:
+            continue
+        s, u = hit
+        x = points[a][0] + s * (points[b][0] - points[a][0])
+        y = points[a][1] + s * (points[b][1] - points[a][1])
+        if min(math.hypot(x - px, y - py) for px, py in (points[a], points[b], points[c], points[d])) <= tolerance:
+            continue  # touching near an end: a T-junction or snap case, not a crossing
+        vid, _ = snapper.add(x, y)
+        splits.setdefault(i, []).append((s, vid))
+        splits.setdefault(j, []).append((u, vid))
+        report["crossings"] += 1
+
+    # 3. clean up: split, drop zero-length and duplicate segments
+    seen = set()
+    pieces = []
+    for sid, (a, b) in enumerate(segments):
+        chain = [a] + [v for _, v in sorted(splits.get(sid, ()))] + [b]
+        for p, q in zip(chain, chain[1:]):
+            key = (p, q) if p < q else (q, p)
+            if p == q or key in seen:
+                report["dropped_segments"] += 1
+                continue
+            seen.add(key)
+            pieces.append((p, q))
+
+    # renumber the vertices that are still used, in order of appearance
+    new_id = {}
+    for p, q in pieces:
+        for v in (p, q):
+            if v not in new_id:
+                new_id[v] = len(new_id)
+    lat, lng = array("d"), array("d")
+    for v in new_id:
+        vlat, vlng = plane.unproject(*points[v])
+        lat.append(vlat)
+        lng.append(vlng)
+    pieces = [(new_id[p], new_id[q]) for p, q in pieces]
+
+    adjacency = [[] for _ in range(len(lat))]
+    for p, q in pieces:
+        adjacency[p].append(q)
+        adjacency[q].append(p)
+
+    component = [-1] * len(lat)
+    sizes = []
+    for start in range(len(lat)):
+        if component[start] >= 0:
+            continue
+        component[start] = len(sizes)
+        stack, size = [start], 0
+        while stack:
+            u = stack.pop()
+            size += 1
+            for v in adjacency[u]:
+                if component[v] < 0:
+                    component[v] = len(sizes)
+                    stack.append(v)
+        sizes.append(size)
+
+    # 4. contract degree-2 chains
+    is_junction = [len(neighbours) != 2 for neighbours in adjacency]
+    edges = []
+    ordered = []  # segments re-emitted along their edge's path
+    used = set()
+
+    def walk(u, v):
+        path = [u, v]
+        while not is_junction[path[-1]] and path[-1] != u:
+            a, b = adjacency[path[-1]]
+            path.append(b if a == path[-2] else a)
+        return path
+
+    def emit(path):
+        length = 0.0
+        for p, q in zip(path, path[1:]):
+            used.add((p, q) if p < q else (q, p))
+            ordered.append((p, q))
+            length += haversine(lat[p], lng[p], lat[q], lng[q])
+        edges.append((path[0], path[-1], length, path))
+
+    for u in range(len(lat)):
+        if not is_junction[u]:
+            continue
+        for v in adjacency[u]:
+            if ((u, v) if u < v else (v, u)) not in used:
+                emit(walk(u, v))
+    # pure cycles have no junction: promote one vertex of each
+    for u in range(len(lat)):
+        for v in adjacency[u]:
+            if ((u, v) if u < v else (v, u)) not in used:
+                is_junction[u] = True
+                emit(walk(u, v))
+
+    junctions = [v for v in range(len(lat)) if is_junction[v]]
+    report.update({
+        "vertices": len(lat),
+        "segments": len(ordered),
+        "junctions": len(junctions),
+        "edges": len(edges),
+        "components": sorted(sizes, reverse=True),
+    })
+    return PreparedNetwork(lat, lng, ordered, junctions, edges, report)
+
+
+def validate(network):
+    """Problems that would make routes wrong; an empty list means the graph is sound."""
+    problems = []
+    n = len(network.lat)
+    if not all(math.isfinite(x) for x in network.lat) or not all(math.isfinite(x) for x in network.lng):
+        problems.append("non-finite coordinates")
+    seen = set()
+    for a, b in network.segments:
+        key = (a, b) if a < b else (b, a)
+        if a == b:
+            problems.append(f"zero-length segment at vertex {a}")
+        elif key in seen:
+            problems.append(f"duplicate segment {a}-{b}")
+        seen.add(key)
+    covered = set()
+    junctions = set(network.junctions)
+    for u, v, length, path in network.edges:
+        if path[0] != u or path[-1] != v or u not in junctions or v not in junctions:
+            problems.append(f"edge {u}-{v} does not run between junctions")
+        if any(p in junctions for p in path[1:-1]):
+            problems.append(f"edge {u}-{v} passes through a junction")
+        if not length > 0:
+            problems.append(f"edge {u}-{v} has length {length}")
+        covered.update(path)
+    if network.segments and len(covered) != n:
+        problems.append(f"{n - len(covered)} vertices are not on any edge")
+    if len(network.report.get("components", ())) > 1:
+        problems.append(f"{len(network.report['components'])} disconnected components "
+                        f"(sizes {network.report['components'][:10]})")
+    return problems
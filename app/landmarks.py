@@ -0,0 +1,126 @@
+# landmarks.py
+"""
+ALT routing: A* with landmarks and the triangle inequality.
+
+A handful of landmark nodes are picked far apart (farthest-point
+selection) and the walking distance from each of them to every node is
+precomputed with a full Dijkstra. For any node v and target t,
+``|d(L, t) - d(L, v)|`` can never exceed the real distance from v to t,
+so it is a valid A* heuristic, and a much tighter one than the straight
+line when paths wind around buildings. Queries then expand only the
+nodes roughly along the route. Costs ``count`` Dijkstra runs when the
+graph is (re)built and ``count * nodes`` floats of memory.
+
+See benchmarks/bench_routing_modes.py for the trade-off on grids of
+10k-1M nodes.
+"""
+import heapq
+import math
+from array import array
+
+ACTIVE_LANDMARKS = 4  # landmarks consulted per query, the best ones for its endpoints
+
+
+def dijkstra_all(offsets, targets, weights, sources):
+    """Distance from the nearest of ``sources`` to every node (inf if unreachable)."""
+    dist = array("d", [math.inf]) * (len(offsets) - 1)
+    heap = []
+    for s in sources:
+        dist[s] = 0.0
+        heap.append((0.0, s))
+    heapq.heapify(heap)
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        for i in range(offsets[u], offsets[u + 1]):
+            v = targets[i]
+            nd = d + weights[i]
+            if nd < dist[v]:
+                dist[v] = nd
+                heapq.heappush(heap, (nd, v))
+    return dist
+
+
+def _farthest(values):
+    """Index of the largest value; inf (not reached yet) counts as largest."""
+    best, best_value = None, -1.0
+    for node, value in enumerate(values):
+        if value > best_value:
+            best, best_value = node, value
+            if value == math.inf:
+                break
+    return best, best_value
+
+
+class LandmarkTable:
+
+    def __init__(self, landmarks, distances):
+        self.landmarks = landmarks
+        self.distances = distances  # one array of node distances per landmark
+
+    @classmethod
+    def build(cls, offsets, targets, weights, count, start=0):
+        """Pick up to ``count`` landmarks by farthest-point selection.
+
+        The first landmark is the node farthest from ``start``; each next one
+        is the node farthest from all landmarks so far, so every connected
+        component gets one before any component gets a second.
+        """
+        n = len(offsets) - 1
+        landmarks, distances = [], []
+        if n == 0 or count <= 0:
+            return cls(landmarks, distances)
+
+        candidate, _ = _farthest(dijkstra_all(offsets, targets, weights, [start]))
+        closest = array("d", [math.inf]) * n
+        while len(landmarks) < count:
+            table = dijkstra_all(offsets, targets, weights, [candidate])
+            landmarks.append(candidate)
+            distances.append(table)
+            for node in range(n):
+                if table[node] < closest[node]:
+                    closest[node] = table[node]
+            candidate, farthest = _farthest(closest)
+            if farthest <= 0.0:
+                break  # every node is a landmark
+        return cls(landmarks, distances)
+
+    def __len__(self):
+        return len(self.landmarks)
+
+    def heuristic(self, sources, goals, active=ACTIVE_LANDMARKS):
+        """Lower bound ``h(node)`` on the cost to reach any of ``goals``.
+
+        ``goals`` maps node -> extra cost, like ``routing.astar``. Only the
+        ``active`` landmarks that give the best bound from the first source
+        are consulted, which keeps each evaluation cheap.
+        """
+        goals = list(goals.items())
+        if not self.landmarks or not goals:
+            return lambda node: 0.0
+
+        def bound(tables, node):
+            best = math.inf
+            for goal, extra in goals:
+                b = 0.0
+                for table in tables:
+                    dv, dg = table[node], table[goal]
+                    if dv == math.inf or dg == math.inf:
+                        if dv != dg:
+                            b = math.inf  # different components: unreachable
+                            break
+                        continue
+                    diff = dv - dg if dv > dg else dg - dv
+                    if diff > b:
+                        b = diff
+                if b + extra < best:
+                    best = b + extra
+            return best
+
+        tables = self.distances
+        if sources and len(tables) > active:
+            source = min(sources, key=lambda item: item[1])[0]
+            tables = sorted(tables, key=lambda table: bound([table], source), reverse=True)[:active]
+
+        return lambda node: bound(tables, node)
@@ -0,0 +1,151 @@
+# llm_pool.py
+"""
+Bounded worker pool for outbound LLM calls.
+
+Gemini requests run on a small dedicated thread pool instead of the WSGI
+worker thread. At most LLM_MAX_CONCURRENCY calls are in flight and at most
+LLM_MAX_QUEUE more may wait; anything beyond that is rejected straight away
+with LLMBusy so the caller can answer with a canned fallback, and every
+call is bounded by LLM_TIMEOUT seconds.
+
+The request thread of every admitted call still waits for its result, for
+up to LLM_TIMEOUT, so up to LLM_MAX_CONCURRENCY + LLM_MAX_QUEUE request
+threads per process can be tied up by the chatbot. Keep that sum well below
+the server's threads per worker process (e.g. gunicorn ``--threads``), or
+LLM traffic can still starve the other routes. The short default queue
+(2) leaves most threads free with the default concurrency (4).
+"""
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+_END = object()
+
+
+class LLMBusy(Exception):
+    """Raised when the pool and its queue are full."""
+
+
+class LLMPool:
+
+    def __init__(self):
+        self.timeout = 20.0
+        self.max_concurrency = 4
+        self.max_queue = 2
+        self.admitted = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_concurrency = int(app.config.setdefault("LLM_MAX_CONCURRENCY", 4))
+        self.max_queue = int(app.config.setdefault("LLM_MAX_QUEUE", 2))
+        self.timeout = float(app.config.setdefault("LLM_TIMEOUT", 20.0))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm")
+        self._slots = threading.BoundedSemaphore(self.max_concurrency + self.max_queue)
+
+    def _admit(self):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise LLMBusy("LLM pool is saturated")
+        with self._lock:
+            self.admitted += 1
+
+    def _submit(self, fn, args, kwargs):
+        future = self._executor.submit(self._run, fn, args, kwargs)
+        # free the slot once the call finishes or is cancelled before starting
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        with self._lock:
+            self.admitted -= 1
+        self._slots.release()
+
+    def _run(self, fn, args, kwargs):
+        with self._lock:
+            self.in_flight += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+
+    def _timed_out(self):
+        with self._lock:
+            self.timeouts += 1
+
+    # -------------------
+    # Public API
+    # -------------------
+    def call(self, fn, *args, **kwargs):
+        """Run ``fn`` on the pool and wait at most LLM_TIMEOUT for its result.
+
+        Raises LLMBusy when saturated and TimeoutError when the call is slow.
+        A timed-out call keeps its slot until the network call returns.
+        """
+        self._admit()
+        future = self._submit(fn, args, kwargs)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            self._timed_out()
+            future.cancel()
+            raise TimeoutError("LLM call timed out") from None
+
+    def stream(self, fn, *args, **kwargs):
+        """Iterate a streaming call (``fn`` returns an iterable) on the pool.
+
+        Chunks are handed over through a queue; the whole stream must finish
+        within LLM_TIMEOUT or TimeoutError is raised from the iterator.
+        """
+        self._admit()
+        chunks = queue.Queue()
+        cancelled = threading.Event()
+
+        def produce():
+            try:
+                for chunk in fn(*args, **kwargs):
+                    if cancelled.is_set():
+                        break
+                    chunks.put(chunk)
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                chunks.put(_END)
+
+        future = self._submit(produce, (), {})
+        deadline = time.monotonic() + self.timeout
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = chunks.get(timeout=max(remaining, 0))
+                except queue.Empty:
+                    self._timed_out()
+                    future.cancel()
+                    raise TimeoutError("LLM stream timed out")
+                if item is _END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # stop pulling tokens if the client went away or we timed out
+            cancelled.set()
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "queued": max(self.admitted - self.in_flight, 0),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
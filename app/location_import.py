@@ -0,0 +1,80 @@
+# location_import.py
+"""
+Bulk import of GeoJSON places into the Location table.
+
+Existing locations are read in one query and compared in memory; new and
+changed places are then written with a single INSERT ... ON CONFLICT (name)
+DO UPDATE statement, so an import of thousands of features is one
+transaction with a constant number of round trips. Running the same
+import twice changes nothing the second time.
+"""
+from sqlalchemy import select
+
+from app import db
+from .models import Location
+from .rollups import upsert_insert
+from .route_table import place_point
+
+CHUNK = 500  # names per IN (...) when reloading changed rows
+
+
+def places_from_features(features):
+    """{name: (category, latitude, longitude)} for named Point features (last one wins)."""
+    places = {}
+    for feature in features:
+        name = (feature.get("properties") or {}).get("name")
+        point = place_point(feature)
+        if not name or point is None:
+            continue
+        category = feature["properties"].get("category", "Other")
+        places[name] = (category, point[0], point[1])
+    return places
+
+
+def import_features(features):
+    """Upsert Locations from GeoJSON features; the caller commits.
+
+    Returns {"added": [...], "updated": [...], "unchanged": n, "skipped": n}
+    where added/updated are location names.
+    """
+    features = list(features)
+    places = places_from_features(features)
+    existing = {
+        row.name: (row.category, row.latitude, row.longitude)
+        for row in db.session.execute(
+            select(Location.name, Location.category, Location.latitude, Location.longitude)
+        )
+    }
+
+    added = [name for name in places if name not in existing]
+    updated = [name for name in places if name in existing and existing[name] != places[name]]
+    rows = [
+        dict(zip(("category", "latitude", "longitude"), places[name]), name=name)
+        for name in added + updated
+    ]
+
+    if rows:
+        stmt = upsert_insert(Location)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Location.name],
+            set_={
+                "category": stmt.excluded.category,
+                "latitude": stmt.excluded.latitude,
+                "longitude": stmt.excluded.longitude,
+            },
+        )
+        db.session.execute(stmt, rows)
+
+    return {
+        "added": added,
+        "updated": updated,
+        "unchanged": len(places) - len(rows),
+        "skipped": len(features) - len(places),
+    }
+
+
+def changed_locations(names):
+    """Location rows for ``names``, loaded in chunks."""
+    names = list(names)
+    for i in range(0, len(names), CHUNK):
+        yield from Location.query.filter(Location.name.in_(names[i:i + CHUNK]))
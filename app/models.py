@@ -1,4 +1,4 @@
-from . import db, login_manager
+from . import db, login_manager, user_cache
 from flask_login import UserMixin
 from datetime import datetime, date
 
@@ -33,6 +33,11 @@ class Location(db.Model):
 
 
 class Visit(db.Model):
+    __table_args__ = (
+        db.Index("ix_visit_location_id_visit_date", "location_id", "visit_date"),
+        db.Index("ix_visit_user_id_timestamp", "user_id", "timestamp"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
     location_id = db.Column(db.Integer, db.ForeignKey("location.id"))
@@ -44,6 +49,11 @@ class Visit(db.Model):
 
 
 class PageView(db.Model):
+    __table_args__ = (
+        db.Index("ix_page_view_view_date_page", "view_date", "page"),
+        db.Index("ix_page_view_user_id_timestamp", "user_id", "timestamp"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     page = db.Column(db.String(200), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
@@ -60,7 +70,7 @@ class ActivityLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     action = db.Column(db.String(255), nullable=False)  # e.g., 'User registered', 'Route updated'
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # recent activity feed
 
     user = db.relationship("User", backref="activities")
 
@@ -68,6 +78,52 @@ class ActivityLog(db.Model):
         return f"<ActivityLog {self.action} at {self.timestamp}>"
 
 
+class OutboxEmail(db.Model):
+    """Outgoing email waiting for (or done with) delivery by app/email_outbox.py"""
+    __table_args__ = (
+        db.Index("ix_outbox_email_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(150), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default="pending")  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f"<OutboxEmail {self.id} to {self.recipient} ({self.status})>"
+
+
+# -------------------
+# Daily rollups (kept up to date by app/rollups.py)
+# -------------------
+class DailyLocationVisits(db.Model):
+    """Visits per location per day"""
+    location_id = db.Column(db.Integer, db.ForeignKey("location.id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    visits = db.Column(db.Integer, nullable=False, default=0)
+
+    location = db.relationship("Location")
+
+
+class DailyPageViews(db.Model):
+    """Pageviews per page per day"""
+    page = db.Column(db.String(200), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    views = db.Column(db.Integer, nullable=False, default=0)
+
+
+class DailySignups(db.Model):
+    """New user registrations per day"""
+    day = db.Column(db.Date, primary_key=True)
+    signups = db.Column(db.Integer, nullable=False, default=0)
+
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return user_cache.get(user_id)
@@ -0,0 +1,60 @@
+# passwords.py
+"""
+Password hashing policy.
+
+Every hash is made with PASSWORD_HASH_METHOD, a werkzeug method string
+such as ``pbkdf2:sha256:600000`` or ``scrypt:16384:8:1`` (missing
+parameters take werkzeug's defaults). Stored hashes record the method
+they were made with, so ``verify_password`` can tell when a user's hash
+is out of date and quietly re-hash it with the current policy on their
+next successful login. See benchmarks/bench_password_hashing.py for what
+each setting costs per login.
+"""
+from flask import current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = "pbkdf2:sha256"  # what the app always used
+SCRYPT_DEFAULTS = ("32768", "8", "1")  # N, r, p
+
+
+def normalise_method(method):
+    """Spell out every parameter, e.g. "scrypt" -> "scrypt:32768:8:1"."""
+    parts = method.split(":")
+    if parts[0] == "pbkdf2":
+        hash_name = parts[1] if len(parts) > 1 else "sha256"
+        iterations = parts[2] if len(parts) > 2 else str(DEFAULT_PBKDF2_ITERATIONS)
+        return f"pbkdf2:{hash_name}:{int(iterations)}"
+    if parts[0] == "scrypt":
+        params = parts[1:] + list(SCRYPT_DEFAULTS[len(parts) - 1:])
+        return "scrypt:" + ":".join(str(int(p)) for p in params[:3])
+    raise ValueError(f"Unsupported password hash method: {method!r}")
+
+
+def current_method():
+    return normalise_method(current_app.config.get("PASSWORD_HASH_METHOD") or DEFAULT_METHOD)
+
+
+def hash_password(password):
+    return generate_password_hash(password, method=current_method())
+
+
+def needs_rehash(stored_hash):
+    """True if ``stored_hash`` wasn't made with the current policy."""
+    method = stored_hash.split("$", 1)[0]
+    try:
+        return normalise_method(method) != current_method()
+    except ValueError:
+        return True
+
+
+def verify_password(user, password):
+    """Check ``password`` against ``user.password``.
+
+    On success, an outdated hash is replaced on ``user`` (the caller
+    commits). Returns True/False.
+    """
+    if not user.password or not check_password_hash(user.password, password):
+        return False
+    if needs_rehash(user.password):
+        user.password = hash_password(password)
+    return True
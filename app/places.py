@@ -0,0 +1,128 @@
+# places.py
+"""
+Shared in-memory copy of campus_places.geojson.
+
+The file is parsed once and indexed by name and alias. It is re-read only
+when its mtime or size changes (checked at most every
+PLACES_CHECK_INTERVAL seconds) or when the admin map editor saves a new
+version through ``save()``. ``version`` goes up on every reload so other
+caches built from the places know when to rebuild.
+"""
+import json
+import os
+import threading
+import time
+
+EMPTY_COLLECTION = {"type": "FeatureCollection", "features": []}
+
+
+def categorise(name):
+    """Rough category for the analytics breakdown, based on the place name."""
+    name = name.lower()
+    if "faculty" in name:
+        return "Faculty"
+    if any(x in name for x in ["cafe", "restaurant", "restoran", "bistro"]):
+        return "Food"
+    if any(x in name for x in ["hall", "library", "surau", "stad", "office", "building", "complex"]):
+        return "Facility"
+    return "Other"
+
+
+class PlaceStore:
+
+    def __init__(self):
+        self.path = None
+        self.check_interval = 1.0
+        self.version = 0
+        self._geojson = EMPTY_COLLECTION
+        self._by_name = {}
+        self._categories = {}
+        self._signature = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.path = app.config.setdefault(
+            "CAMPUS_PLACES_GEOJSON",
+            os.path.join(app.root_path, "static", "campus_places.geojson"),
+        )
+        self.check_interval = float(app.config.setdefault("PLACES_CHECK_INTERVAL", 1.0))
+        app.extensions["place_store"] = self
+
+    # -------------------
+    # Loading
+    # -------------------
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _index(self, geojson, signature):
+        by_name = {}
+        categories = {"Faculty": 0, "Food": 0, "Facility": 0, "Other": 0}
+        for feature in geojson.get("features", []):
+            properties = feature.get("properties") or {}
+            name = properties.get("name")
+            categories[categorise(name or "")] += 1
+            if not name:
+                continue
+            by_name[name] = feature
+            for alias in properties.get("aliases") or []:
+                by_name.setdefault(alias, feature)
+
+        self._geojson = geojson
+        self._by_name = by_name
+        self._categories = categories
+        self._signature = signature
+        self.version += 1
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._signature is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            self._checked_at = now
+            signature = self._stat()
+            if signature == self._signature and self.version:
+                return
+            if signature is None:
+                self._index(EMPTY_COLLECTION, None)
+                return
+            with open(self.path, "r", encoding="utf-8") as f:
+                geojson = json.load(f)
+            self._index(geojson, signature)
+
+    def save(self, geojson):
+        """Write a new FeatureCollection to disk and swap it in immediately."""
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(geojson, f, indent=2)
+            os.replace(tmp_path, self.path)
+            self._index(geojson, self._stat())
+            self._checked_at = time.monotonic()
+
+    # -------------------
+    # Reading (returned objects are shared, don't mutate them)
+    # -------------------
+    def geojson(self):
+        self._refresh()
+        return self._geojson
+
+    def features(self):
+        return self.geojson().get("features", [])
+
+    def find(self, name):
+        """Feature for a place name or alias, or None."""
+        self._refresh()
+        return self._by_name.get(name)
+
+    def names(self):
+        self._refresh()
+        return list(self._by_name)
+
+    def categories(self):
+        self._refresh()
+        return dict(self._categories)
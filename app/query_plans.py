@@ -0,0 +1,71 @@
+# query_plans.py
+"""
+EXPLAIN QUERY PLAN checks for the analytics hot queries.
+
+``flask explain-queries`` prints the SQLite plan of each query below and
+fails if any of them falls back to a full table scan, so a dropped or
+mistyped index shows up before it shows up on the dashboard.
+"""
+import re
+from datetime import date, timedelta
+
+from sqlalchemy import func, select
+
+from app import db
+from .models import ActivityLog, Location, PageView, Visit
+
+# "SCAN page_view" (older SQLite: "SCAN TABLE page_view") is a full table scan;
+# "SCAN page_view USING INDEX ..." is not
+FULL_SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)$")
+
+
+def hot_queries():
+    """(label, statement) for every query the indexes are meant to serve."""
+    today = date.today()
+    week_ago = today - timedelta(days=6)
+    return [
+        ("pageviews per page, date range",
+         select(PageView.page, func.count(PageView.id))
+         .where(PageView.view_date.between(week_ago, today))
+         .group_by(PageView.page)),
+        ("pageview rollup rebuild",
+         select(PageView.page, PageView.view_date, func.count(PageView.id))
+         .where(PageView.view_date.between(week_ago, today))
+         .group_by(PageView.page, PageView.view_date)),
+        ("visits to a location, date range",
+         select(func.count(Visit.id))
+         .where(Visit.location_id == 1, Visit.visit_date.between(week_ago, today))),
+        ("visit rollup rebuild",
+         select(Visit.location_id, Visit.visit_date, func.count(Visit.id))
+         .where(Visit.location_id.isnot(None), Visit.visit_date.between(week_ago, today))
+         .group_by(Visit.location_id, Visit.visit_date)),
+        ("recent activity feed",
+         select(ActivityLog).order_by(ActivityLog.timestamp.desc()).limit(10)),
+        ("location by name (log_visit)",
+         select(Location).where(Location.name == "Library")),
+        ("a user's recent visits",
+         select(Visit).where(Visit.user_id == 1).order_by(Visit.timestamp.desc()).limit(20)),
+        ("a user's recent pageviews",
+         select(PageView).where(PageView.user_id == 1).order_by(PageView.timestamp.desc()).limit(20)),
+    ]
+
+
+def explain(statement):
+    """EXPLAIN QUERY PLAN rows (the ``detail`` column) for a statement."""
+    sql = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+    rows = db.session.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + sql).fetchall()
+    return [row[-1] for row in rows]
+
+
+def full_scans(plan):
+    """Tables a plan reads with a full scan."""
+    return [match.group(1) for match in map(FULL_SCAN_RE.match, plan) if match]
+
+
+def check_hot_queries():
+    """[(label, plan, full_scans)] for every hot query."""
+    results = []
+    for label, statement in hot_queries():
+        plan = explain(statement)
+        results.append((label, plan, full_scans(plan)))
+    return results
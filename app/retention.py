@@ -0,0 +1,160 @@
+# retention.py
+"""
+Retention for the raw event tables (PageView, Visit).
+
+Whole calendar months that are older than RETENTION_DAYS are moved out of
+the database into gzip'd CSV files, one per table and month:
+
+    instance/archive/page_view/2025-01.csv.gz
+
+The analytics pages read the daily rollups, which are left untouched, so
+only ``ArchiveReader`` and ad-hoc reporting ever need the archived rows.
+Archiving a month is idempotent: the file is merged by id and replaced
+atomically before the rows are deleted, so an interrupted run can simply
+be repeated.
+"""
+import csv
+import gzip
+import os
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Date, DateTime, Integer, delete, select
+
+from app import db
+from .models import PageView, Visit
+
+# table name -> (model, day column)
+ARCHIVED_TABLES = {
+    "page_view": (PageView, PageView.view_date),
+    "visit": (Visit, Visit.visit_date),
+}
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def archive_dir(app):
+    return app.config.get("ARCHIVE_DIR") or os.path.join(app.instance_path, "archive")
+
+
+def _parser(column):
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat
+    if isinstance(column.type, Date):
+        return date.fromisoformat
+    if isinstance(column.type, Integer):
+        return int
+    return str
+
+
+class ArchiveReader:
+    """Read archived rows back as dicts, typed like the original columns."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, table, month):
+        return os.path.join(self.directory, table, f"{month:%Y-%m}.csv.gz")
+
+    def months(self, table):
+        """Archived months for ``table``, oldest first."""
+        folder = os.path.join(self.directory, table)
+        if not os.path.isdir(folder):
+            return []
+        names = sorted(n for n in os.listdir(folder) if n.endswith(".csv.gz"))
+        return [datetime.strptime(n[:7], "%Y-%m").date() for n in names]
+
+    def archived_before(self):
+        """First day that is still fully in the database (None if nothing is archived)."""
+        latest = [months[-1] for months in map(self.months, ARCHIVED_TABLES) if months]
+        return next_month(max(latest)) if latest else None
+
+    def _read_file(self, table, path):
+        model, _ = ARCHIVED_TABLES[table]
+        parsers = {c.name: _parser(c) for c in model.__table__.columns}
+        with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+            for raw in csv.DictReader(f):
+                yield {
+                    key: (parsers[key](value) if value != "" else None)
+                    for key, value in raw.items()
+                }
+
+    def rows(self, table, start=None, end=None):
+        """Archived rows of ``table`` whose day is within [start, end]."""
+        _, day_column = ARCHIVED_TABLES[table]
+        for month in self.months(table):
+            if (start and next_month(month) <= start) or (end and month > end):
+                continue
+            for row in self._read_file(table, self.path(table, month)):
+                day = row[day_column.name]
+                if (start is None or day >= start) and (end is None or day <= end):
+                    yield row
+
+    def count_by(self, table, column, start=None, end=None):
+        """Counter of archived rows grouped by ``column``, e.g. page or location_id."""
+        return Counter(row[column] for row in self.rows(table, start, end))
+
+
+def _write_month(reader, table, month, rows):
+    """Merge ``rows`` into the month's archive file (by id) and replace it atomically."""
+    model, _ = ARCHIVED_TABLES[table]
+    columns = [c.name for c in model.__table__.columns]
+    path = reader.path(table, month)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    merged = {}
+    if os.path.exists(path):
+        merged = {row["id"]: row for row in reader._read_file(table, path)}
+    merged.update((row["id"], row) for row in rows)
+
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for key in sorted(merged):
+            writer.writerow({
+                k: (v.isoformat() if isinstance(v, (date, datetime)) else v)
+                for k, v in merged[key].items()
+            })
+    os.replace(tmp_path, path)
+    return len(merged)
+
+
+def archive_old_events(app, days=None, dry_run=False):
+    """Move whole months older than ``days`` (default RETENTION_DAYS) to the archive.
+
+    Returns {(table, month): rows moved}.
+    """
+    days = app.config.get("RETENTION_DAYS", 90) if days is None else days
+    cutoff = month_start(date.today() - timedelta(days=days))  # keep the cutoff's month
+    reader = ArchiveReader(archive_dir(app))
+    moved = {}
+
+    for table, (model, day_column) in ARCHIVED_TABLES.items():
+        oldest = db.session.query(db.func.min(day_column)).scalar()
+        if oldest is None:
+            continue
+        month = month_start(oldest)
+        while month < cutoff:
+            end = next_month(month)
+            in_month = (day_column >= month, day_column < end)
+            rows = [
+                dict(row._mapping)
+                for row in db.session.execute(
+                    select(*model.__table__.columns).where(*in_month).order_by(model.id)
+                )
+            ]
+            if rows:
+                moved[(table, month)] = len(rows)
+                if not dry_run:
+                    _write_month(reader, table, month, rows)
+                    db.session.execute(delete(model).where(*in_month))
+                    db.session.commit()
+            month = end
+    return moved
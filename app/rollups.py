@@ -0,0 +1,115 @@
+# rollups.py
+"""
+Daily analytics rollups.
+
+Counters are bumped in the same transaction that writes the raw event
+(pageview batch, visit, signup), so the admin dashboard and analytics page
+read a few small rollup rows instead of scanning the raw tables.
+``rebuild()`` recomputes a date range from the raw tables and is what the
+``flask rebuild-rollups`` command and the first-boot backfill use.
+"""
+from collections import Counter
+from datetime import date, datetime
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, select
+
+from app import db
+from .models import (
+    User, Visit, PageView,
+    DailyLocationVisits, DailyPageViews, DailySignups,
+)
+from .retention import ArchiveReader, archive_dir
+
+
+def upsert_insert(model):
+    if db.engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(model)
+
+
+def bump(model, keys, count_column, counts):
+    """Add ``counts`` ({key tuple: n}) onto the rollup rows of ``model``.
+
+    Runs on the current session; the caller commits.
+    """
+    if not counts:
+        return
+    rows = [dict(zip(keys, key), **{count_column: n}) for key, n in counts.items()]
+    stmt = upsert_insert(model)
+    column = getattr(model, count_column)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={count_column: column + getattr(stmt.excluded, count_column)},
+    )
+    db.session.execute(stmt, rows)
+
+
+# -------------------
+# Event hooks
+# -------------------
+def record_pageviews(rows):
+    counts = Counter((row["page"], row["view_date"]) for row in rows)
+    bump(DailyPageViews, ["page", "day"], "views", counts)
+
+
+def record_visits(rows):
+    counts = Counter((row["location_id"], row["visit_date"]) for row in rows)
+    bump(DailyLocationVisits, ["location_id", "day"], "visits", counts)
+
+
+def record_signup(day=None):
+    day = day or datetime.utcnow().date()
+    bump(DailySignups, ["day"], "signups", {(day,): 1})
+
+
+# -------------------
+# Compaction / backfill
+# -------------------
+def rebuild(start=None, end=None):
+    """Recompute rollups for [start, end] (inclusive) from the raw tables.
+
+    Days whose pageviews/visits have been moved to the archive keep their
+    existing rollup rows.
+    """
+    start = start or date.min
+    end = end or date.max
+    archived_before = ArchiveReader(archive_dir(current_app)).archived_before()
+    event_start = max(start, archived_before) if archived_before else start
+    signup_day = func.date(User.created_at)
+
+    jobs = [
+        (DailyPageViews, ["page", "day", "views"], event_start,
+         select(PageView.page, PageView.view_date, func.count(PageView.id))
+         .where(PageView.view_date.between(event_start, end))
+         .group_by(PageView.page, PageView.view_date)),
+        (DailyLocationVisits, ["location_id", "day", "visits"], event_start,
+         select(Visit.location_id, Visit.visit_date, func.count(Visit.id))
+         .where(Visit.location_id.isnot(None), Visit.visit_date.between(event_start, end))
+         .group_by(Visit.location_id, Visit.visit_date)),
+        (DailySignups, ["day", "signups"], start,
+         select(signup_day, func.count(User.id))
+         .where(User.created_at.isnot(None), signup_day.between(start.isoformat(), end.isoformat()))
+         .group_by(signup_day)),
+    ]
+    for model, columns, since, query in jobs:
+        db.session.execute(delete(model).where(model.day.between(since, end)))
+        db.session.execute(insert(model).from_select(columns, query))
+    db.session.commit()
+
+
+def backfill_if_empty():
+    """Populate the rollups once for databases that predate them."""
+    empty = not any(
+        db.session.query(model).first()
+        for model in (DailyPageViews, DailyLocationVisits, DailySignups)
+    )
+    has_events = any(
+        db.session.query(model.id).first()
+        for model in (PageView, Visit, User)
+    )
+    if empty and has_events:
+        rebuild()
+        print("✅ Analytics rollups backfilled")
@@ -0,0 +1,179 @@
+# route_table.py
+"""
+Precomputed routes between every pair of named campus places.
+
+Place-to-place routes only change when campus_paths.geojson or
+campus_places.geojson change, so they are computed once (by ``flask
+init-db`` / ``flask build-route-table``, or on the first lookup) and kept in a small SQLite file in the
+instance folder: distance, ETA and the route as an encoded polyline. The
+table is tagged with a hash of both GeoJSON files and rebuilt only when
+that hash no longer matches.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+
+from .routing import decode_polyline, encode_polyline
+
+TABLE_FORMAT = "2"  # bump when the stored rows or the routing graph change
+
+
+def place_point(feature):
+    """(lat, lng) of a Point feature, or None."""
+    geometry = (feature or {}).get("geometry") or {}
+    if geometry.get("type") != "Point":
+        return None
+    lng, lat = geometry["coordinates"][:2]
+    return lat, lng
+
+
+class RouteTable:
+
+    def __init__(self):
+        self.path = None
+        self._graph = None
+        self._place_store = None
+        self._conn = None
+        self._checked = None  # (graph version, place store version) last verified
+        self._lock = threading.Lock()
+
+    def init_app(self, app, graph, place_store):
+        os.makedirs(app.instance_path, exist_ok=True)
+        self.path = app.config.setdefault(
+            "ROUTE_TABLE_PATH", os.path.join(app.instance_path, "route_table.db")
+        )
+        self._graph = graph
+        self._place_store = place_store
+        app.extensions["route_table"] = self
+        # off by default: `flask init-db` builds it, otherwise the first lookup does
+        if app.config.setdefault("ROUTE_TABLE_PRECOMPUTE", False):
+            self.ensure_fresh()
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS routes ("
+                " origin TEXT NOT NULL, destination TEXT NOT NULL,"
+                " distance REAL NOT NULL, duration REAL NOT NULL, polyline TEXT NOT NULL,"
+                " PRIMARY KEY (origin, destination)) WITHOUT ROWID"
+            )
+            self._conn.commit()
+        return self._conn
+
+    # -------------------
+    # Invalidation
+    # -------------------
+    def signature(self):
+        """Hash of both GeoJSON files (and the row format)."""
+        digest = hashlib.sha1(TABLE_FORMAT.encode())
+        for path in (self._graph.path, self._place_store.path):
+            try:
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+            except OSError:
+                digest.update(b"missing")
+        return digest.hexdigest()
+
+    def _stored_signature(self):
+        row = self._db().execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+        return row[0] if row else None
+
+    def ensure_fresh(self, force=False):
+        """Rebuild the table if either GeoJSON file changed since it was built."""
+        self._graph.refresh_if_changed()
+        self._place_store.geojson()  # picks up edits to campus_places.geojson
+        state = (self._graph.version, self._place_store.version)
+        if state == self._checked and not force:
+            return False
+        with self._lock:
+            if state == self._checked and not force:
+                return False
+            signature = self.signature()
+            rebuilt = force or signature != self._stored_signature()
+            if rebuilt:
+                self._build(signature)
+            self._checked = state
+            return rebuilt
+
+    # -------------------
+    # Building
+    # -------------------
+    def _named_places(self):
+        places = []
+        for feature in self._place_store.features():
+            name = (feature.get("properties") or {}).get("name")
+            point = place_point(feature)
+            if name and point:
+                places.append((name, point))
+        return places
+
+    def _build(self, signature):
+        places = self._named_places()
+        # one graph snapshot for the whole build; snap every place once instead of once per pair
+        graph = self._graph.snapshot()
+        snapped = []
+        for name, point in places:
+            snap = self._graph.snap(*point, snapshot=graph)
+            if snap is not None:
+                snapped.append((name, point, snap))
+        rows = []
+        for origin, start, start_snap in snapped:
+            for destination, end, end_snap in snapped:
+                if origin == destination:
+                    continue
+                result = self._graph.route(start, end, start_snap, end_snap, snapshot=graph)
+                if result is None:
+                    continue
+                rows.append((
+                    origin, destination,
+                    round(result["distance"], 2), round(result["duration"], 2),
+                    encode_polyline(result["coordinates"]),
+                ))
+
+        conn = self._db()
+        with conn:
+            conn.execute("DELETE FROM routes")
+            conn.executemany("INSERT OR REPLACE INTO routes VALUES (?, ?, ?, ?, ?)", rows)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('signature', ?)", (signature,))
+        print(f"✅ Route table built: {len(rows)} routes between {len(places)} places")
+
+    # -------------------
+    # Lookup
+    # -------------------
+    def canonical_name(self, name):
+        """Place name for a name or alias, or None if it isn't a named point."""
+        feature = self._place_store.find(name)
+        if place_point(feature) is None:
+            return None
+        return feature["properties"]["name"]
+
+    def lookup(self, origin, destination):
+        """Stored route between two place names/aliases, or None."""
+        origin = self.canonical_name(origin)
+        destination = self.canonical_name(destination)
+        if origin is None or destination is None or origin == destination:
+            return None
+        self.ensure_fresh()
+        with self._lock:
+            row = self._db().execute(
+                "SELECT distance, duration, polyline FROM routes WHERE origin = ? AND destination = ?",
+                (origin, destination),
+            ).fetchone()
+        if row is None:
+            return None
+        distance, duration, polyline = row
+        return {
+            "coordinates": decode_polyline(polyline),
+            "distance": distance,
+            "duration": duration,
+            "polyline": polyline,
+        }
+
+    def stats(self):
+        with self._lock:
+            count = self._db().execute("SELECT COUNT(*) FROM routes").fetchone()[0]
+            return {"routes": count, "signature": self._stored_signature()}
@@ -1,167 +1,36 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash 
-import google.generativeai as genai
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, Response, stream_with_context
 import os
 from dotenv import load_dotenv  # For secure API key management
 from flask_login import login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
-from app import db, serializer
+from app import db, serializer, pageview_writer, activity_writer, chat_cache, llm_pool, user_cache, email_outbox, gemini
 from .models import User
+from .passwords import hash_password, verify_password
 from .email_utils import send_email
 from .auth import auth_bp
 from .admin import admin_bp
+from .venues import parse_venue_code, find_venue_code
 from datetime import datetime
+import json
 import random
-import re
 
 # Load environment variables
 load_dotenv()
 
 main = Blueprint('main', __name__)
 
-# Initialize Google Gemini AI
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-
-if not GOOGLE_API_KEY:
-    raise ValueError("GOOGLE_API_KEY environment variable is required")
-
-genai.configure(api_key=GOOGLE_API_KEY)
-
-# Configure the model with more creative parameters
-generation_config = {
-    "temperature": 1.0,  # Higher for more creativity and variation
-    "top_p": 0.95,       # Higher for more diverse responses
-    "top_k": 50,         # More token choices for variety
-    "max_output_tokens": 500,  # Longer responses when needed
-}
-try:
-    model = genai.GenerativeModel(
-        model_name='gemini-2.0-flash',
-        generation_config=generation_config
-    )
 
-except Exception as e:
-    print(f"gemini-2.0-flash error: {e}. Falling back to gemini-1.5-flash.")
-    model = genai.GenerativeModel(
-        model_name='gemini-1.5-flash',
-        generation_config=generation_config
-    )
+def get_chat_message():
+    """The user's message from a JSON or form-encoded chat request ('' if missing or malformed)"""
+    if request.is_json:
+        data = request.get_json(silent=True)
+        message = data.get('message', '') if isinstance(data, dict) else ''
+        return message if isinstance(message, str) else ''
+    return request.form.get('message', '')
 
-# MMU Venue Code Parser - Based on official MMU venue code format
-def parse_venue_code(venue_code):
-    """
-    Parse MMU venue codes according to the official format:
-    [Campus][Building][Wing][Type][Floor][Room Number]
-    Example: CLCR2045 = Cyberjaya Campus, FOE, Wing C, Room, Second Floor, room 045
-    Example: CNMX = Cyberjaya Campus, CLC, Main Area, Theatre (defaults: Ground Floor, room 001)
-    Example: CNMX1001 = Cyberjaya Campus, CLC, Main Area, Theatre, First Floor, room 001
-    """
-    venue_code = venue_code.upper().strip().replace(' ', '')
-    
-    # Only Cyberjaya campus (as requested)
-    campus_map = {
-        'C': 'Cyberjaya Campus'
-    }
-    
-    # Building mapping (2nd alphabet)
-    building_map = {
-        'J': 'FCM (Faculty of Creative Multimedia)',
-        'L': 'FOE (Faculty of Engineering)', 
-        'N': 'CLC (Cyberjaya Learning Centre)',  # Ensures 'N' = CLC (not FCM)
-        'Q': 'FCI (Faculty of Computing and Informatics)',
-        'R': 'FOM (Faculty of Management)'
-    }
-    
-    # Wing mapping (3rd alphabet)
-    wing_map = {
-        'M': 'Main Area',
-        'A': 'Wing A',
-        'B': 'Wing B', 
-        'C': 'Wing C'
-    }
-    
-    # Type mapping (4th alphabet)
-    type_map = {
-        'R': 'Room',
-        'X': 'Theatre'
-    }
-    
-    # Floor mapping (1st number)
-    floor_map = {
-        '0': 'Ground Floor',
-        '1': 'First Floor',
-        '2': 'Second Floor',
-        '3': 'Third Floor'
-    }
-    
-    # Hardcoded tips per building (adds flavor—edit/remove as needed)
-    building_tips = {
-        'FOE (Faculty of Engineering)': 'Engineering central—labs and WiFi are top-notch, but stairs get crowded!',
-        'FCI (Faculty of Computing and Informatics)': 'IT/computing hub—great for coding sessions, strong AC too.',
-        'FOM (Faculty of Management)': 'Business spot—quiet lounges for presentations.',
-        'FCM (Faculty of Creative Multimedia)': 'Creative vibes—art supplies nearby if needed.',
-        'CLC (Cyberjaya Learning Centre)': 'Central learning area—easy access from main gate.'
-    }
-    
-    try:
-        # Parse the venue code (format: CLCR2045 or partial CNMX)
-        if len(venue_code) >= 4:  # Min for partial (C + building + wing + type)
-            campus = campus_map.get(venue_code[0], 'Cyberjaya Campus')  # Default to Cyberjaya
-            building = building_map.get(venue_code[1], 'Unknown Building')
-            wing = wing_map.get(venue_code[2], 'Unknown Wing')
-            room_type = type_map.get(venue_code[3], 'Unknown Type')
-            
-            # Handle floor/room: Full code vs. partial
-            if len(venue_code) >= 7:
-                floor_char = venue_code[4]
-                room_raw = venue_code[5:]
-            else:
-                floor_char = '0'  # Default for partial: Ground Floor
-                room_raw = '001'  # Default room number
-            
-            floor = floor_map.get(floor_char, 'Unknown Floor')
-            room_number = str(room_raw).zfill(3)  # Pad to 3 digits (e.g., "045")
-            
-            # FIXED: full_location and tip now inside if (vars are defined)
-            full_location = f"{building}, {wing}, {floor}, {room_type} {room_number}"
-            tip = building_tips.get(building, '')  # Get tip for this building
-            
-            return {
-                'campus': campus,
-                'building': building,
-                'wing': wing,
-                'type': room_type,
-                'floor': floor,
-                'room_number': room_number,
-                'full_location': full_location,
-                'tip': tip  # NEW: Include tip for use in responses
-            }
-        else:
-            print(f"Venue code too short: {venue_code} (needs at least 4 chars)")
-            return None
-    except Exception as e:
-        print(f"Parsing error for {venue_code}: {e}")
-        return None
 
-
-@main.route('/chat', methods=['POST'])
-def chat():
-    try:
-        # Get the user's message
-        if request.is_json:
-            user_message = request.json.get('message', '')
-        else:
-            user_message = request.form.get('message', '')
-        
-        if not user_message.strip():
-            return jsonify({'response': 'Hey, I need something to work with here! What\'s on your mind?'}), 400
-        
-        # Check for venue code queries FIRST
-        venue_response = handle_venue_query(user_message)
-        if venue_response:
-            return jsonify({'response': venue_response})
-        
-        # Enhanced context prompt for more natural conversation
-        context_prompt = f"""You are Queen Elizabeth III, a friendly AI assistant who's like a knowledgeable senior student at Multimedia University (MMU) Malaysia. You're approachable, relatable, and can chat about anything - from campus life to pop culture to general life stuff.
+def build_chat_prompt(user_message, now):
+    # Enhanced context prompt for more natural conversation
+    return f"""You are Queen Elizabeth III, a friendly AI assistant who's like a knowledgeable senior student at Multimedia University (MMU) Malaysia. You're approachable, relatable, and can chat about anything - from campus life to pop culture to general life stuff.
 
         PERSONALITY TRAITS:
         - Conversational and casual, like talking to a friend
@@ -198,17 +67,41 @@ def chat():
 
         IMPORTANT: You can talk about ANYTHING, not just MMU stuff. Be a well-rounded conversational partner.
 
-        Current time context: {datetime.now().strftime("%H:%M on %A")}
+        Current time context: {now.strftime("%H:%M on %A")}
         Student message: "{user_message}"
 
         Respond as Queen Elizabeth III would - naturally, helpfully, and with personality. Keep it conversational and engaging."""
+
+
+@main.route('/chat', methods=['POST'])
+def chat():
+    try:
+        user_message = get_chat_message()
+        
+        if not user_message.strip():
+            return jsonify({'response': 'Hey, I need something to work with here! What\'s on your mind?'}), 400
+        
+        # Check for venue code queries FIRST
+        venue_response = handle_venue_query(user_message)
+        if venue_response:
+            return jsonify({'response': venue_response})
+
+        # Repeated questions in the same hour are answered from the cache
+        now = datetime.now()
+        cached_response = chat_cache.get(user_message, now)
+        if cached_response:
+            return jsonify({'response': add_conversational_flair(cached_response, user_message)})
+        
+        context_prompt = build_chat_prompt(user_message, now)
         
         # Generate AI response with error handling
         try:
-            response = model.generate_content(context_prompt)
+            # Runs on the bounded LLM pool; raises LLMBusy / TimeoutError under load
+            response = llm_pool.call(gemini.generate_content, context_prompt)
             
             if response.text:
                 ai_response = response.text.strip()
+                chat_cache.set(user_message, ai_response, now)
                 # Add some randomness to prevent identical responses
                 ai_response = add_conversational_flair(ai_response, user_message)
             else:
@@ -233,47 +126,98 @@ def chat():
             'error': True
         }), 500
 
+def sse_event(data, event=None):
+    """Format one Server-Sent Event"""
+    message = f"data: {json.dumps(data)}\n\n"
+    return f"event: {event}\n{message}" if event else message
+
+
+def sse_response(events):
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@main.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Like /chat, but forwards Gemini's output as Server-Sent Events while
+    it is generated. Each event carries {"text": ...}; a final "done" event
+    ends the reply. Venue codes, cache hits and fallbacks arrive as a single
+    text event."""
+    user_message = get_chat_message()
+
+    if not user_message.strip():
+        return jsonify({'response': 'Hey, I need something to work with here! What\'s on your mind?'}), 400
+
+    def single(text):
+        yield sse_event({'text': text})
+        yield sse_event({}, event='done')
+
+    venue_response = handle_venue_query(user_message)
+    if venue_response:
+        return sse_response(single(venue_response))
+
+    now = datetime.now()
+    cached_response = chat_cache.get(user_message, now)
+    if cached_response:
+        return sse_response(single(add_conversational_flair(cached_response, user_message)))
+
+    def generate():
+        parts = []
+        completed = False
+        try:
+            prompt = build_chat_prompt(user_message, now)
+            for chunk in llm_pool.stream(gemini.generate_content, prompt, stream=True):
+                try:
+                    text = chunk.text
+                except ValueError:  # chunk without text parts (e.g. safety block)
+                    continue
+                if text:
+                    parts.append(text)
+                    yield sse_event({'text': text})
+            completed = True
+        except Exception as ai_error:
+            print(f"Gemini API error: {ai_error}")
+
+        if not parts:
+            yield sse_event({'text': get_natural_fallback_response(user_message)})
+        elif completed:
+            chat_cache.set(user_message, "".join(parts).strip(), now)
+        yield sse_event({}, event='done')
+
+    return sse_response(generate())
+
 def handle_venue_query(message):
     """Handle venue/classroom location queries"""
-    venue_patterns = [
-        r'\b([C][JLNQR][MABC][RX]?\s*\d{0,4})\b',  # Partial/full: 0-4 digits (Cyberjaya focus)
-        r'where\s+(?:is|are)?\s+([C][JLNQR][MABC][RX]?\s*\d{0,4})',
-        r'find\s+([C][JLNQR][MABC][RX]?\s*\d{0,4})',
-        r'location\s+(?:of|for)?\s+([C][JLNQR][MABC][RX]?\s*\d{0,4})',
-        r'class\s+([C][JLNQR][MABC][RX]?\s*\d{0,4})'  # "class CNMX"
-    ]
-    
-    message_upper = message.upper()
+    venue_code = find_venue_code(message)
+    if not venue_code:
+        return None
+
+    venue_info = parse_venue_code(venue_code)
     
-    for pattern in venue_patterns:
-        match = re.search(pattern, message_upper)
-        if match:
-            venue_code = match.group(1).replace(' ', '')
-            venue_info = parse_venue_code(venue_code)
+    # FIXED: Check venue_info immediately after parsing, within the same scope
+    if venue_info:
+        # NEW: Clear breakdown format
+        breakdown = f"The class {venue_code} is in {venue_info['full_location']}."
+
+        # Add tip if available
+        if venue_info['tip']:
+            breakdown += f" {venue_info['tip']}"
             
-            # FIXED: Check venue_info immediately after parsing, within the same scope
-            if venue_info:
-                # NEW: Clear breakdown format
-                breakdown = f"The class {venue_code} is in {venue_info['full_location']}."
-
-                # Add tip if available
-                if venue_info['tip']:
-                    breakdown += f" {venue_info['tip']}"
-                    
-                # Randomized extras (variety)
-                extras = [
-                    " Need directions from the main gate or library?",
-                    " (Partial code? Add floor/room for exact, e.g., CNMX1001.) Hope you're not late!",
-                    " First time? Campus can be tricky—allow extra time!",
-                    " Pro tip: Check the MMU app for maps too."
-                ]
-                full_response = breakdown + random.choice(extras)
-
-                return full_response
-            else:
-                return f"Hmm, I couldn't parse that venue code '{venue_code}' properly. Could you double-check it? MMU codes usually follow a specific format."
-    
-    return None
+        # Randomized extras (variety)
+        extras = [
+            " Need directions from the main gate or library?",
+            " (Partial code? Add floor/room for exact, e.g., CNMX1001.) Hope you're not late!",
+            " First time? Campus can be tricky—allow extra time!",
+            " Pro tip: Check the MMU app for maps too."
+        ]
+        full_response = breakdown + random.choice(extras)
+
+        return full_response
+    else:
+        return f"Hmm, I couldn't parse that venue code '{venue_code}' properly. Could you double-check it? MMU codes usually follow a specific format."
 
 def add_conversational_flair(response, original_message):
     """Add some randomness and personality to prevent repetitive responses"""
@@ -399,7 +343,16 @@ def facilities():
 
 @main.route('/health-check')
 def health_check():
-    return jsonify({'status': 'healthy', 'service': 'MMU AI Assistant'})
+    return jsonify({
+        'status': 'healthy',
+        'service': 'MMU AI Assistant',
+        'pageviews': pageview_writer.stats(),
+        'activity_log': activity_writer.stats(),
+        'chat_cache': chat_cache.stats(),
+        'llm': llm_pool.stats(),
+        'user_cache': user_cache.stats(),
+        'email_outbox': email_outbox.stats()
+    })
 
 #manveet part
 
@@ -428,7 +381,7 @@ def change_password():
         new_pw = request.form.get('new_password')
         confirm_pw = request.form.get('confirm_password')
 
-        if not check_password_hash(current_user.password, current_pw):
+        if not verify_password(current_user, current_pw):
             flash("Current password is incorrect.", "danger")
             return redirect(url_for('main.change_password'))
 
@@ -436,7 +389,7 @@ def change_password():
             flash("New passwords do not match.", "danger")
             return redirect(url_for('main.change_password'))
 
-        current_user.password = generate_password_hash(new_pw, method="pbkdf2:sha256")
+        current_user.password = hash_password(new_pw)
         db.session.commit()
         flash("Password updated!", "success")
         return redirect(url_for('main.account'))
@@ -472,7 +425,7 @@ def reset_password(token):
         if new_pw != confirm_pw:
             flash("Passwords do not match.", "danger")
             return redirect(request.url)
-        user.password = generate_password_hash(new_pw, method="pbkdf2:sha256")
+        user.password = hash_password(new_pw)
         db.session.commit()
         flash("Password reset successful!", "success")
         return redirect(url_for('auth.login'))
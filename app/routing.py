@@ -0,0 +1,539 @@
+# routing.py
+"""
+Server-side campus routing.
+
+The walking network in campus_paths.geojson is repaired and simplified
+(see graph_prep.py) and turned into a compact adjacency structure (CSR
+arrays) once, on the first route request, and every /api/route request
+runs an A* search over it instead of each browser rebuilding the graph and
+running Dijkstra itself.
+"""
+import hashlib
+import heapq
+import json
+import math
+import os
+import threading
+from array import array
+from collections import namedtuple
+
+EARTH_RADIUS_M = 6371008.8
+WALKING_SPEED_MPS = 1.4      # same pace scripts.js used for the ETA
+SNAP_TOLERANCE_M = 1.0       # vertices closer than this are treated as the same point
+SNAP_CELL_M = 25.0           # grid cell size of the segment index used to snap route endpoints
+ROUTING_MODES = ("astar", "alt")  # straight-line A*, or A* with landmarks (landmarks.py)
+
+
+def haversine(lat1, lng1, lat2, lng2):
+    """Great-circle distance in metres between two lat/lng points."""
+    p1 = math.radians(lat1)
+    p2 = math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def iter_lines(geojson):
+    """Yield every LineString in a FeatureCollection as a list of (lng, lat)."""
+    for feature in geojson.get("features", []):
+        geometry = feature.get("geometry") or {}
+        if geometry.get("type") == "LineString":
+            yield geometry.get("coordinates", [])
+        elif geometry.get("type") == "MultiLineString":
+            for line in geometry.get("coordinates", []):
+                yield line
+
+
+def _encode_number(value, out):
+    """Append one signed integer to ``out`` as polyline characters."""
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        out.append(chr((0x20 | (value & 0x1F)) + 63))
+        value >>= 5
+    out.append(chr(value + 63))
+
+
+def _decode_numbers(encoded):
+    """Yield the signed integers in a polyline-encoded string."""
+    index = 0
+    while index < len(encoded):
+        shift = result = 0
+        while True:
+            b = ord(encoded[index]) - 63
+            index += 1
+            result |= (b & 0x1F) << shift
+            shift += 5
+            if b < 0x20:
+                break
+        yield ~(result >> 1) if result & 1 else result >> 1
+
+
+def encode_polyline(coordinates, precision=6):
+    """Encode [[lat, lng], ...] with the Google polyline algorithm."""
+    factor = 10 ** precision
+    out = []
+    prev_lat = prev_lng = 0
+    for lat, lng in coordinates:
+        ilat, ilng = round(lat * factor), round(lng * factor)
+        _encode_number(ilat - prev_lat, out)
+        _encode_number(ilng - prev_lng, out)
+        prev_lat, prev_lng = ilat, ilng
+    return "".join(out)
+
+
+def decode_polyline(encoded, precision=6):
+    """Inverse of ``encode_polyline``."""
+    factor = 10 ** precision
+    coordinates = []
+    lat = lng = 0
+    numbers = _decode_numbers(encoded)
+    for dlat, dlng in zip(numbers, numbers):
+        lat += dlat
+        lng += dlng
+        coordinates.append([lat / factor, lng / factor])
+    return coordinates
+
+
+def encode_deltas(values):
+    """Encode a list of integers as polyline characters, each stored as the
+    difference from the one before (small for runs of nearby node ids)."""
+    out = []
+    previous = 0
+    for value in values:
+        _encode_number(value - previous, out)
+        previous = value
+    return "".join(out)
+
+
+def decode_deltas(encoded):
+    """Inverse of ``encode_deltas``."""
+    values = []
+    current = 0
+    for delta in _decode_numbers(encoded):
+        current += delta
+        values.append(current)
+    return values
+
+
+def astar(offsets, targets, weights, sources, goals, h):
+    """A* with a binary heap over a CSR graph.
+
+    ``sources`` is a list of ``(node, cost)`` seeds, ``goals`` maps node ->
+    extra cost to the destination and ``h(node)`` must never overestimate
+    the remaining cost (``lambda node: 0`` gives plain Dijkstra). Returns
+    ``(cost, goal node, prev, settled)`` where ``prev`` maps each reached
+    node to ``(previous node, CSR index of the edge)`` (None for sources)
+    and ``settled`` counts the nodes expanded.
+    """
+    dist = {}
+    prev = {}
+    heap = []
+    for node, cost in sources:
+        if cost < dist.get(node, math.inf):
+            dist[node] = cost
+            prev[node] = None
+            heapq.heappush(heap, (cost + h(node), cost, node))
+
+    best_cost = math.inf
+    best_node = None
+    settled = 0
+    while heap:
+        f, g, u = heapq.heappop(heap)
+        if f >= best_cost:
+            break
+        if g > dist[u]:
+            continue
+        settled += 1
+        if u in goals and g + goals[u] < best_cost:
+            best_cost = g + goals[u]
+            best_node = u
+        for i in range(offsets[u], offsets[u + 1]):
+            v = targets[i]
+            ng = g + weights[i]
+            if ng < dist.get(v, math.inf):
+                dist[v] = ng
+                prev[v] = (u, i)
+                heapq.heappush(heap, (ng + h(v), ng, v))
+    return best_cost, best_node, prev, settled
+
+
+# Everything one query reads, published by CampusGraph.build with a single
+# assignment so a reload never mixes old and new arrays mid-request.
+GraphSnapshot = namedtuple("GraphSnapshot", [
+    "version", "lat", "lng", "segments", "seg_edge", "seg_pos", "seg_offset",
+    "node_vertex", "offsets", "targets", "weights", "edge_ids",
+    "edge_u", "edge_v", "edge_length", "edge_paths", "landmarks", "report", "problems",
+    "plane", "seg_grid",
+])
+
+EMPTY_GRAPH = GraphSnapshot(
+    0, array("d"), array("d"), [], array("i"), array("i"), array("d"),
+    array("i"), array("i", [0]), array("i"), array("d"), array("i"),
+    array("i"), array("i"), array("d"), [], None, {}, [],
+    None, None,
+)
+
+
+class CampusGraph:
+    """Walking graph: full geometry for snapping, contracted graph for search.
+
+    The arrays live in an immutable ``GraphSnapshot``; every query takes
+    the current one once and reads only from it. Vertex ``v`` sits at ``(lat[v], lng[v])`` and ``segments`` are the
+    (a, b) vertex pairs of every path piece. The search graph only has the
+    junctions (``node_vertex[k]`` is junction k's vertex): junction ``k``'s
+    neighbours are ``targets[offsets[k]:offsets[k + 1]]`` with the matching
+    edge lengths (metres) in ``weights`` and contracted edge ids in
+    ``edge_ids``. Edge ``e`` runs from junction ``edge_u[e]`` to
+    ``edge_v[e]`` along the vertices ``edge_paths[e]``; segment ``i`` is
+    piece ``seg_pos[i]`` of edge ``seg_edge[i]``, starting
+    ``seg_offset[i]`` metres along it. ``seg_grid`` buckets the segments
+    (projected with ``plane``) so snapping only looks at nearby ones.
+
+    In "alt" mode the landmark table is built by a background thread after
+    each load; until it is published, queries use the straight-line bound.
+    """
+
+    def __init__(self, path=None, snap_tolerance=SNAP_TOLERANCE_M, mode="astar", landmark_count=8):
+        self.path = path
+        self.snap_tolerance = snap_tolerance
+        self.mode = mode
+        self.landmark_count = landmark_count
+        self.signature = None
+        self._snapshot = EMPTY_GRAPH
+        self._landmark_thread = None
+        self._network = None  # (version, payload, etag) for /api/paths
+        self._lock = threading.Lock()
+        if path:
+            self.load(path)
+
+    def init_app(self, app):
+        path = app.config.setdefault(
+            "CAMPUS_PATHS_GEOJSON",
+            os.path.join(app.root_path, "static", "campus_paths.geojson"),
+        )
+        self.snap_tolerance = float(app.config.setdefault("CAMPUS_SNAP_TOLERANCE_M", SNAP_TOLERANCE_M))
+        self.mode = app.config.setdefault("ROUTING_MODE", "astar")
+        self.landmark_count = int(app.config.setdefault("ALT_LANDMARKS", 8))
+        if self.mode not in ROUTING_MODES:
+            raise ValueError("ROUTING_MODE must be 'astar' or 'alt'")
+        # parsed on first use, not while the worker boots
+        self.path = path
+        app.extensions["campus_graph"] = self
+
+    # -------------------
+    # Building
+    # -------------------
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def load(self, path):
+        self.path = path
+        signature = self._stat()
+        with open(path, "r", encoding="utf-8") as f:
+            geojson = json.load(f)
+        self.build(geojson)
+        self.signature = signature
+        print(f"✅ Campus graph loaded: {self.node_count} vertices, {self.edge_count} segments "
+              f"-> {self.junction_count} junctions, {len(self._snapshot.edge_paths)} edges")
+        for problem in self.problems:
+            print(f"⚠️ Campus graph: {problem}")
+
+    def refresh_if_changed(self):
+        """Reload the graph if the GeoJSON file changed on disk (or was never loaded)."""
+        if not self.path or self._stat() == self.signature:
+            return False
+        with self._lock:
+            if self._stat() == self.signature:
+                return False
+            self.load(self.path)
+            return True
+
+    def ensure_loaded(self):
+        if self.signature is None and self.path:
+            self.refresh_if_changed()
+
+    def snapshot(self):
+        """The current GraphSnapshot; pass it to ``snap``/``route`` to pin a batch of queries to it."""
+        self.ensure_loaded()
+        return self._snapshot
+
+    def build(self, geojson):
+        from .graph_prep import Plane, SegmentGrid, prepare_network, validate
+
+        network = prepare_network(list(iter_lines(geojson)), tolerance=self.snap_tolerance)
+        lat, lng = network.lat, network.lng
+        junction_of = {v: k for k, v in enumerate(network.junctions)}
+
+        segments = []
+        seg_edge, seg_pos, seg_offset = array("i"), array("i"), array("d")
+        edge_u, edge_v, edge_length = array("i"), array("i"), array("d")
+        edge_paths = []
+        best = {}  # (u, v) -> edge id; only the shortest of parallel edges is searched
+        for e, (u, v, length, path) in enumerate(network.edges):
+            offset = 0.0
+            for j, (a, b) in enumerate(zip(path, path[1:])):
+                segments.append((a, b))
+                seg_edge.append(e)
+                seg_pos.append(j)
+                seg_offset.append(offset)
+                offset += haversine(lat[a], lng[a], lat[b], lng[b])
+            ku, kv = junction_of[u], junction_of[v]
+            edge_u.append(ku)
+            edge_v.append(kv)
+            edge_length.append(length)
+            edge_paths.append(array("i", path))
+            key = (ku, kv) if ku < kv else (kv, ku)
+            if ku != kv and (key not in best or length < edge_length[best[key]]):
+                best[key] = e
+
+        adjacency = [[] for _ in network.junctions]
+        for (ku, kv), e in best.items():
+            adjacency[ku].append((kv, edge_length[e], e))
+            adjacency[kv].append((ku, edge_length[e], e))
+        offsets, targets, weights, edge_ids = array("i", [0]), array("i"), array("d"), array("i")
+        for neighbours in adjacency:
+            for v, length, e in neighbours:
+                targets.append(v)
+                weights.append(length)
+                edge_ids.append(e)
+            offsets.append(len(targets))
+
+        plane = Plane(sum(lat) / len(lat) if lat else 0.0)
+        points = [plane.project(lat[v], lng[v]) for v in range(len(lat))]
+        seg_grid = SegmentGrid(points, segments, SNAP_CELL_M)
+
+        # one reference swap, so concurrent queries never see a half-built graph
+        g = GraphSnapshot(
+            self._snapshot.version + 1, lat, lng, segments, seg_edge, seg_pos, seg_offset,
+            array("i", network.junctions), offsets, targets, weights, edge_ids,
+            edge_u, edge_v, edge_length, edge_paths, None,
+            dict(network.report, routing_mode=self.mode), validate(network),
+            plane, seg_grid,
+        )
+        self._snapshot = g
+        if self.mode == "alt":
+            self._landmark_thread = threading.Thread(
+                target=self._build_landmarks, args=(g,), name="CampusLandmarks", daemon=True)
+            self._landmark_thread.start()
+
+    def _build_landmarks(self, g):
+        """Precompute the ALT landmarks for snapshot ``g`` off the request path."""
+        from .landmarks import LandmarkTable
+
+        table = LandmarkTable.build(g.offsets, g.targets, g.weights, self.landmark_count)
+        with self._lock:
+            if self._snapshot is g:  # otherwise the graph was reloaded meanwhile
+                self._snapshot = g._replace(landmarks=table, report=dict(g.report, landmarks=len(table)))
+
+    def wait_for_landmarks(self, timeout=None):
+        """Block until the landmark table of the last load is published (for the CLI)."""
+        thread = self._landmark_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    @property
+    def report(self):
+        return self._snapshot.report
+
+    @property
+    def problems(self):
+        return self._snapshot.problems
+
+    @property
+    def node_count(self):
+        return len(self._snapshot.lat)
+
+    @property
+    def edge_count(self):
+        return len(self._snapshot.segments)
+
+    @property
+    def junction_count(self):
+        return len(self._snapshot.node_vertex)
+
+    # -------------------
+    # Client payload
+    # -------------------
+    def network(self):
+        """The path network for drawing on the map, as ``(payload, etag)``.
+
+        ``vertices`` is every node once, as an encoded polyline (fixed-point
+        deltas at ``precision`` decimals), and ``edges`` the flattened
+        ``[a0, b0, a1, b1, ...]`` node pairs through ``encode_deltas``. The
+        client decodes both and draws the segments directly. Rebuilt when the
+        graph is reloaded.
+        """
+        g = self.snapshot()
+        cached = self._network
+        if cached and cached[0] == g.version:
+            return cached[1], cached[2]
+        payload = {
+            "format": 1,
+            "precision": 6,
+            "vertices": encode_polyline(zip(g.lat, g.lng)),
+            "edges": encode_deltas([node for segment in g.segments for node in segment]),
+        }
+        etag = hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+        self._network = (g.version, payload, etag)
+        return payload, etag
+
+    # -------------------
+    # Snapping
+    # -------------------
+    def snap(self, lat, lng, snapshot=None):
+        """Project a point onto the nearest path segment.
+
+        Returns ``(snap_lat, snap_lng, i, t)`` where ``t`` is the position of
+        the snapped point along segment ``i`` (0..1), or None for an empty graph.
+        ``i`` is only meaningful for the snapshot the point was snapped on.
+        """
+        g = snapshot or self.snapshot()
+        if not g.segments:
+            return None
+        i, t, _ = g.seg_grid.nearest(*g.plane.project(lat, lng))
+        a, b = g.segments[i]
+        snap_lat = g.lat[a] + t * (g.lat[b] - g.lat[a])
+        snap_lng = g.lng[a] + t * (g.lng[b] - g.lng[a])
+        return snap_lat, snap_lng, i, t
+
+    @staticmethod
+    def _locate(g, i, t):
+        """(edge, piece, metres along the edge) of a point snapped to segment i."""
+        a, b = g.segments[i]
+        length = haversine(g.lat[a], g.lng[a], g.lat[b], g.lng[b])
+        return g.seg_edge[i], g.seg_pos[i], g.seg_offset[i] + t * length
+
+    # -------------------
+    # Searching
+    # -------------------
+    def shortest_path(self, sources, goals, goal_lat, goal_lng, snapshot=None):
+        """A* over the junction graph.
+
+        ``sources`` is a list of ``(junction, cost)`` seeds and ``goals`` maps
+        junction -> extra cost to reach the destination from it. The
+        heuristic is the straight-line distance to the goal point, or with
+        ROUTING_MODE "alt" the larger of that and the landmark bound.
+        Returns ``(cost, [junctions], [edge ids between them])`` or
+        ``(inf, [], [])`` when the goal is unreachable.
+        """
+        g = snapshot or self.snapshot()
+        lat, lng, node_vertex = g.lat, g.lng, g.node_vertex
+        offsets, targets, weights, edge_ids = g.offsets, g.targets, g.weights, g.edge_ids
+
+        def h(k):
+            v = node_vertex[k]
+            return haversine(lat[v], lng[v], goal_lat, goal_lng)
+
+        if g.landmarks is not None:
+            bound = g.landmarks.heuristic(sources, goals)
+            straight = h
+
+            def h(k):
+                return max(straight(k), bound(k))
+
+        best_cost, best_node, prev, _ = astar(offsets, targets, weights, sources, goals, h)
+        if best_node is None:
+            return math.inf, [], []
+        nodes, via = [best_node], []
+        while prev[nodes[-1]] is not None:
+            u, i = prev[nodes[-1]]
+            nodes.append(u)
+            via.append(edge_ids[i])
+        nodes.reverse()
+        via.reverse()
+        return best_cost, nodes, via
+
+    @staticmethod
+    def _ends(g, e, pos):
+        """Junction costs from a point ``pos`` metres along edge e."""
+        costs = {}
+        for node, cost in ((g.edge_u[e], pos), (g.edge_v[e], g.edge_length[e] - pos)):
+            costs[node] = min(cost, costs.get(node, math.inf))
+        return costs
+
+    @staticmethod
+    def _via_start(g, e, pos, node):
+        """Whether leaving/reaching ``node`` from ``pos`` on edge e goes via the edge's start."""
+        if g.edge_u[e] != g.edge_v[e]:
+            return node == g.edge_u[e]
+        return pos <= g.edge_length[e] - pos  # loop: the shorter way round
+
+    def _vertices(self, g, s_edge, s_piece, s_pos, e_edge, e_piece, e_pos, nodes, via):
+        """Vertex ids walked from the start snap point to the end snap point."""
+        if not nodes:  # along one edge
+            path = g.edge_paths[s_edge]
+            if s_pos <= e_pos:
+                return list(path[s_piece + 1:e_piece + 1])
+            return list(path[e_piece + 1:s_piece + 1])[::-1]
+
+        path = g.edge_paths[s_edge]
+        if self._via_start(g, s_edge, s_pos, nodes[0]):
+            vertices = list(path[:s_piece + 1])[::-1]
+        else:
+            vertices = list(path[s_piece + 1:])
+        for node, e in zip(nodes, via):
+            path = g.edge_paths[e]
+            vertices += list(path[1:]) if g.edge_u[e] == node else list(path[::-1][1:])
+        path = g.edge_paths[e_edge]
+        if self._via_start(g, e_edge, e_pos, nodes[-1]):
+            vertices += list(path[1:e_piece + 1])
+        else:
+            vertices += list(path[e_piece + 1:-1])[::-1]
+        return vertices
+
+    def route(self, start, end, start_snap=None, end_snap=None, snapshot=None):
+        """Walking route between two (lat, lng) points.
+
+        Both ends are snapped onto the nearest path segment, exactly like the
+        old client-side router did; callers routing between the same points
+        many times can pass the ``snap`` results in, together with the
+        ``snapshot`` they were snapped on. Returns a dict with
+        ``coordinates`` ([lat, lng] pairs), ``distance`` (m) and ``duration``
+        (s), or None.
+        """
+        g = snapshot or self.snapshot()
+        if start_snap is None:
+            start_snap = self.snap(*start, snapshot=g)
+        if end_snap is None:
+            end_snap = self.snap(*end, snapshot=g)
+        if start_snap is None or end_snap is None:
+            return None
+
+        s_lat, s_lng, si, st = start_snap
+        e_lat, e_lng, ei, et = end_snap
+        s_edge, s_piece, s_pos = self._locate(g, si, st)
+        e_edge, e_piece, e_pos = self._locate(g, ei, et)
+
+        sources = list(self._ends(g, s_edge, s_pos).items())
+        goals = self._ends(g, e_edge, e_pos)
+        cost, nodes, via = self.shortest_path(sources, goals, e_lat, e_lng, snapshot=g)
+
+        # both points on the same edge: walking straight along it may win
+        if s_edge == e_edge:
+            direct = abs(s_pos - e_pos)
+            if direct <= cost:
+                cost, nodes, via = direct, [], []
+
+        if cost == math.inf:
+            return None
+
+        vertices = self._vertices(g, s_edge, s_piece, s_pos, e_edge, e_piece, e_pos, nodes, via)
+        coordinates = [[start[0], start[1]], [s_lat, s_lng]]
+        coordinates += [[g.lat[v], g.lng[v]] for v in vertices]
+        coordinates += [[e_lat, e_lng], [end[0], end[1]]]
+
+        distance = cost + haversine(start[0], start[1], s_lat, s_lng) + haversine(e_lat, e_lng, end[0], end[1])
+        return {
+            "coordinates": coordinates,
+            "distance": distance,
+            "duration": distance / WALKING_SPEED_MPS,
+        }
@@ -0,0 +1,246 @@
+# spatial.py
+"""
+Spatial index for "what's near me" queries.
+
+Points are projected to a local equirectangular plane (metres) and bucketed
+into a uniform grid, so nearest-k and within-radius queries only look at a
+few cells around the query point. ``PlaceIndex`` keeps a grid in sync with
+the place store (campus_places.geojson) and the Location table.
+"""
+import math
+import threading
+
+from .routing import EARTH_RADIUS_M
+
+
+class GridIndex:
+    """Uniform grid of points keyed by an arbitrary hashable key."""
+
+    def __init__(self, cell_size=50.0, ref_lat=0.0):
+        self.cell_size = cell_size
+        self.kx = math.cos(math.radians(ref_lat))
+        self._cells = {}
+        self._items = {}  # key -> (x, y, cell, payload)
+        self._bounds = None
+
+    def project(self, lat, lng):
+        x = math.radians(lng) * EARTH_RADIUS_M * self.kx
+        y = math.radians(lat) * EARTH_RADIUS_M
+        return x, y
+
+    def _cell(self, x, y):
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def __len__(self):
+        return len(self._items)
+
+    def upsert(self, key, lat, lng, payload):
+        self.remove(key)
+        x, y = self.project(lat, lng)
+        cell = self._cell(x, y)
+        self._items[key] = (x, y, cell, payload)
+        self._cells.setdefault(cell, set()).add(key)
+        self._bounds = None
+
+    def remove(self, key):
+        item = self._items.pop(key, None)
+        if item is None:
+            return
+        bucket = self._cells.get(item[2])
+        bucket.discard(key)
+        if not bucket:
+            del self._cells[item[2]]
+        self._bounds = None
+
+    def bounds(self):
+        """(min_cx, min_cy, max_cx, max_cy) of the occupied cells."""
+        if self._bounds is None and self._cells:
+            xs = [cell[0] for cell in self._cells]
+            ys = [cell[1] for cell in self._cells]
+            self._bounds = (min(xs), min(ys), max(xs), max(ys))
+        return self._bounds
+
+    def _ring(self, cx, cy, r):
+        if r == 0:
+            yield cx, cy
+            return
+        for dx in range(-r, r + 1):
+            yield cx + dx, cy - r
+            yield cx + dx, cy + r
+        for dy in range(-r + 1, r):
+            yield cx - r, cy + dy
+            yield cx + r, cy + dy
+
+    def nearest(self, lat, lng, k=1, max_distance=math.inf):
+        """The ``k`` closest items as ``[(distance_m, payload), ...]``."""
+        if not self._items or k <= 0:
+            return []
+        px, py = self.project(lat, lng)
+        cx, cy = self._cell(px, py)
+
+        # never search further out than the occupied cells reach
+        min_cx, min_cy, max_cx, max_cy = self.bounds()
+        max_ring = max(abs(min_cx - cx), abs(max_cx - cx), abs(min_cy - cy), abs(max_cy - cy))
+
+        found = []
+        r = 0
+        while r <= max_ring:
+            for cell in self._ring(cx, cy, r):
+                for key in self._cells.get(cell, ()):
+                    x, y, _, payload = self._items[key]
+                    found.append((math.hypot(x - px, y - py), payload))
+            found.sort(key=lambda item: item[0])
+            del found[k:]
+            # anything in ring r+1 or beyond is at least r cells away
+            reach = r * self.cell_size
+            if (len(found) == k and found[-1][0] <= reach) or reach > max_distance:
+                break
+            r += 1
+        return [item for item in found if item[0] <= max_distance]
+
+    def within(self, lat, lng, radius):
+        """All items within ``radius`` metres, closest first."""
+        if not self._items:
+            return []
+        px, py = self.project(lat, lng)
+        cx, cy = self._cell(px, py)
+        reach = int(math.ceil(radius / self.cell_size))
+        # only the part of the square that overlaps the occupied cells
+        min_cx, min_cy, max_cx, max_cy = self.bounds()
+        found = []
+        for gx in range(max(cx - reach, min_cx), min(cx + reach, max_cx) + 1):
+            for gy in range(max(cy - reach, min_cy), min(cy + reach, max_cy) + 1):
+                for key in self._cells.get((gx, gy), ()):
+                    x, y, _, payload = self._items[key]
+                    d = math.hypot(x - px, y - py)
+                    if d <= radius:
+                        found.append((d, payload))
+        found.sort(key=lambda item: item[0])
+        return found
+
+
+class PlaceIndex:
+    """Grid index over named places from the GeoJSON store and Location table.
+
+    GeoJSON places win over Location rows with the same name. The GeoJSON
+    side is re-synced (only the names that changed) whenever the place
+    store's version moves; Location rows are loaded once and then kept up to
+    date through ``upsert_location`` / ``remove_location``.
+    """
+
+    def __init__(self):
+        self.cell_size = 50.0
+        self.grid = None
+        self._place_store = None
+        self._places_version = None
+        self._places = {}
+        self._locations = None
+        self._lock = threading.RLock()
+
+    def init_app(self, app, place_store):
+        self.cell_size = float(app.config.setdefault("PLACES_INDEX_CELL_M", 50.0))
+        self._place_store = place_store
+        app.extensions["place_index"] = self
+
+    @staticmethod
+    def _payload(name, lat, lng, category=None, aliases=None, source="geojson"):
+        return {
+            "name": name,
+            "category": category,
+            "aliases": aliases or [],
+            "lat": lat,
+            "lng": lng,
+            "source": source,
+        }
+
+    def _apply(self, names):
+        """Re-derive the grid entries for ``names`` from both sources."""
+        for name in names:
+            item = self._places.get(name) or (self._locations or {}).get(name)
+            if item is None:
+                self.grid.remove(name)
+            else:
+                self.grid.upsert(name, item["lat"], item["lng"], item)
+
+    def _sync(self):
+        geojson = self._place_store.geojson()
+        if self._place_store.version == self._places_version and self._locations is not None:
+            return
+        with self._lock:
+            if self._place_store.version == self._places_version and self._locations is not None:
+                return
+            places = {}
+            for feature in geojson.get("features", []):
+                properties = feature.get("properties") or {}
+                geometry = feature.get("geometry") or {}
+                if not properties.get("name") or geometry.get("type") != "Point":
+                    continue
+                lng, lat = geometry["coordinates"][:2]
+                places[properties["name"]] = self._payload(
+                    properties["name"], lat, lng,
+                    category=properties.get("category"),
+                    aliases=properties.get("aliases"),
+                )
+
+            if self.grid is None:
+                lats = [p["lat"] for p in places.values()]
+                ref_lat = sum(lats) / len(lats) if lats else 0.0
+                self.grid = GridIndex(self.cell_size, ref_lat)
+
+            if self._locations is None:
+                self._load_locations()
+
+            changed = {name for name in places.keys() | self._places.keys()
+                       if places.get(name) != self._places.get(name)}
+            self._places = places
+            self._places_version = self._place_store.version
+            self._apply(changed)
+
+    def _load_locations(self):
+        from .models import Location
+
+        rows = Location.query.filter(
+            Location.latitude.isnot(None), Location.longitude.isnot(None)
+        ).all()
+        self._locations = {
+            row.name: self._payload(row.name, row.latitude, row.longitude, row.category, source="location")
+            for row in rows
+        }
+        self._apply(self._locations)
+
+    # -------------------
+    # Incremental updates
+    # -------------------
+    def upsert_location(self, location):
+        if self._locations is None:
+            return  # not built yet; the first query loads everything
+        with self._lock:
+            if location.latitude is None or location.longitude is None:
+                self._locations.pop(location.name, None)
+            else:
+                self._locations[location.name] = self._payload(
+                    location.name, location.latitude, location.longitude,
+                    location.category, source="location",
+                )
+            self._apply([location.name])
+
+    def remove_location(self, name):
+        if self._locations is None:
+            return
+        with self._lock:
+            self._locations.pop(name, None)
+            self._apply([name])
+
+    # -------------------
+    # Queries
+    # -------------------
+    # the grid's cell sets change under upsert_location, so queries hold the lock too
+    def nearest(self, lat, lng, k=5):
+        self._sync()
+        with self._lock:
+            return self.grid.nearest(lat, lng, k)
+
+    def within(self, lat, lng, radius):
+        self._sync()
+        with self._lock:
+            return self.grid.within(lat, lng, radius)
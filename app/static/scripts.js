@@ -25,16 +25,52 @@ map.setMaxZoom(19);
 // ============================
 let campusPolylines = [];
 
-fetch("static/campus_paths.geojson")
+// Signed integers packed with the Google polyline character scheme
+function decodeNumbers(encoded) {
+  const numbers = [];
+  let index = 0;
+  while (index < encoded.length) {
+    let shift = 0, result = 0, b;
+    do {
+      b = encoded.charCodeAt(index++) - 63;
+      result |= (b & 0x1f) << shift;
+      shift += 5;
+    } while (b >= 0x20);
+    numbers.push(result & 1 ? ~(result >> 1) : result >> 1);
+  }
+  return numbers;
+}
+
+// /api/paths: vertex table (encoded polyline) + flattened edge list (deltas)
+fetch("/api/paths")
 .then(res => res.json())
 .then(data => {
-  var campusLayer = L.geoJSON(data, { 
-    style: { color: "red", weight: 2, dashArray: '2,4', opacity: 0.25 } 
-  }).addTo(map);
+  const factor = Math.pow(10, data.precision);
+  const numbers = decodeNumbers(data.vertices);
+  const vertices = [];
+  let lat = 0, lng = 0;
+  for (let i = 0; i < numbers.length; i += 2) {
+    lat += numbers[i];
+    lng += numbers[i + 1];
+    vertices.push([lat / factor, lng / factor]);
+  }
 
-  campusLayer.eachLayer(l => { 
-    if(l instanceof L.Polyline) campusPolylines.push(l); 
+  const segments = [];
+  let node = 0, a = null;
+  decodeNumbers(data.edges).forEach(delta => {
+    node += delta;
+    if (a === null) {
+      a = node;
+    } else {
+      segments.push([vertices[a], vertices[node]]);
+      a = null;
+    }
   });
+
+  const campusLayer = L.polyline(segments, {
+    color: "red", weight: 2, dashArray: '2,4', opacity: 0.25
+  }).addTo(map);
+  campusPolylines.push(campusLayer);
 });
 
 
@@ -42,7 +78,7 @@ fetch("static/campus_paths.geojson")
 // Load Campus Places
 // ============================
 let campusPlaces = {};
-fetch("static/campus_places.geojson")
+fetch("/assets/campus_places.geojson")
 .then(res => res.json())
 .then(data => {
   data.features.forEach(feature => {
@@ -62,7 +98,7 @@ fetch("static/campus_places.geojson")
 });
 
 // -----------------------------
-// Helpers: flatten, key, projection
+// Helpers: flatten, projection
 // -----------------------------
 function flattenLatLngs(latlngs) {
   // recursion in case getLatLngs() returns nested arrays (multilines)
@@ -74,10 +110,6 @@ function flattenLatLngs(latlngs) {
   return out;
 }
 
-function key(latlng) {
-  return latlng.lat.toFixed(6) + "," + latlng.lng.toFixed(6);
-}
-
 // treat lat/lng as planar for small campus area: project p onto segment a-b
 function projectPointOnSegment(p, a, b) {
   const px = p.lng, py = p.lat;
@@ -115,33 +147,49 @@ function snapToPolyline(latlng, polylines) {
 }
 
 
-// -----------------------------
-// Build graph (slightly hardened: flatten coordinates, avoid duplicate edges)
-// -----------------------------
-function buildGraphFromPolylines(polylines) {
-  let graph = {};
-
-  function addEdge(aLatLng, bLatLng, dist) {
-    const a = key(aLatLng), b = key(bLatLng);
-    if (!graph[a]) graph[a] = {};
-    if (!graph[b]) graph[b] = {};
-    // keep smallest if multiple edges between same nodes
-    graph[a][b] = Math.min(graph[a][b] || Infinity, dist);
-    graph[b][a] = Math.min(graph[b][a] || Infinity, dist);
+// ============================
+// Visit logging (buffered, sent in batches)
+// ============================
+const VISIT_BATCH_SIZE = 10;
+const VISIT_FLUSH_MS = 15000;
+let visitQueue = [];
+let visitFlushTimer = null;
+
+function queueVisit(name) {
+  visitQueue.push({ location: name, ts: Date.now() });
+  if (visitQueue.length >= VISIT_BATCH_SIZE) {
+    flushVisits();
+  } else if (!visitFlushTimer) {
+    visitFlushTimer = setTimeout(flushVisits, VISIT_FLUSH_MS);
   }
+}
 
-  polylines.forEach(pl => {
-    let coords = flattenLatLngs(pl.getLatLngs());
-    for (let i = 0; i < coords.length - 1; i++) {
-      let a = coords[i], b = coords[i + 1];
-      let dist = a.distanceTo(b);
-      addEdge(a, b, dist);
-    }
-  });
-
-  return graph;
+function flushVisits() {
+  clearTimeout(visitFlushTimer);
+  visitFlushTimer = null;
+  if (visitQueue.length === 0) return;
+
+  const body = JSON.stringify({ visits: visitQueue });
+  visitQueue = [];
+  // sendBeacon survives page unloads; fall back to a keepalive fetch if it refuses
+  const blob = new Blob([body], { type: "application/json" });
+  if (!(navigator.sendBeacon && navigator.sendBeacon("/admin/log_visits", blob))) {
+    fetch("/admin/log_visits", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: body,
+      keepalive: true
+    }).catch(() => {});
+  }
 }
 
+// Flush whatever is queued when the tab is hidden or closed
+document.addEventListener("visibilitychange", () => {
+  if (document.visibilityState === "hidden") flushVisits();
+});
+window.addEventListener("pagehide", flushVisits);
+
+
 // ============================
 // Custom Campus Search + Routing
 // ============================
@@ -223,14 +271,8 @@ function initCampusSearch() {
     if (currentDestMarker) map.removeLayer(currentDestMarker);
     currentDestMarker = L.marker(coords).addTo(map).bindPopup(name).openPopup();
 
-    // Log visit to backend
-    fetch("/admin/log_visit", {
-      method: "POST",
-      headers: {
-      "Content-Type": "application/json"
-      },
-      body: JSON.stringify({ location: name })
-    });
+    // Log visit to backend (batched, see flushVisits)
+    queueVisit(name);
 
     suggestionBox.innerHTML = '';
     searchInput.value = '';
@@ -282,161 +324,41 @@ document.getElementById("startBtn").addEventListener("click", () => {
 });
 
 // ============================
-// Build Graph from Campus Paths
-// ============================
-function buildGraphFromPolylines(polylines) {
-  let graph = {};
-
-  function key(latlng) {
-    return latlng.lat.toFixed(6) + "," + latlng.lng.toFixed(6);
-  }
-
-  polylines.forEach(pl => {
-    let coords = pl.getLatLngs();
-    for (let i = 0; i < coords.length - 1; i++) {
-      let a = key(coords[i]);
-      let b = key(coords[i + 1]);
-      let dist = coords[i].distanceTo(coords[i + 1]);
-
-      if (!graph[a]) graph[a] = {};
-      if (!graph[b]) graph[b] = {};
-
-      graph[a][b] = dist;
-      graph[b][a] = dist;
-    }
-  });
-
-  return graph;
-}
-
-// ============================
-// Dijkstra’s Algorithm
-// ============================
-function dijkstra(graph, startKey, endKey) {
-  let distances = {};
-  let prev = {};
-  let pq = new Set(Object.keys(graph));
-
-  Object.keys(graph).forEach(node => {
-    distances[node] = Infinity;
-  });
-  distances[startKey] = 0;
-
-  while (pq.size > 0) {
-    let u = null;
-    pq.forEach(node => {
-      if (u === null || distances[node] < distances[u]) {
-        u = node;
-      }
-    });
-
-    if (u === endKey) break;
-    pq.delete(u);
-
-    Object.keys(graph[u]).forEach(v => {
-      let alt = distances[u] + graph[u][v];
-      if (alt < distances[v]) {
-        distances[v] = alt;
-        prev[v] = u;
-      }
-    });
-  }
-
-  let path = [];
-  let u = endKey;
-  while (u) {
-    path.unshift(u);
-    u = prev[u];
-  }
-
-  return path;
-}
-
-// ============================
-// Polyline Distance Helper
+// Campus Router (server-side A* over the path graph)
 // ============================
-function polylineDistance(latlngs) {
-  let dist = 0;
-  for (let i = 1; i < latlngs.length; i++) {
-    dist += latlngs[i - 1].distanceTo(latlngs[i]);
-  }
-  return dist;
-}
+let routeRequestSeq = 0;
 
-// ============================
-// Custom Router with Dijkstra + Snap Points
-// ============================
 var customRouter = {
   route: function(waypoints, callback) {
     let start = waypoints[0].latLng;
     let end = waypoints[1].latLng;
-
-    // build graph from red campus polylines
-    let graph = buildGraphFromPolylines(campusPolylines);
-
-    // snap start & end to nearest points on campus polylines
-    let startSnap = snapToPolyline(start, campusPolylines);
-    let endSnap = snapToPolyline(end, campusPolylines);
-
-    if (!startSnap || !endSnap) {
-      return callback("No nearby path found", null);
-    }
-    // helper: add snapped point into the graph as a new node
-    function insertSnapNode(snapObj) {
-      const snapKey = key(snapObj.point);
-      if (graph[snapKey]) return; // already inserted
-
-      const aKey = key(snapObj.a);
-      const bKey = key(snapObj.b);
-
-      if (!graph[aKey]) graph[aKey] = {};
-      if (!graph[bKey]) graph[bKey] = {};
-
-      const da = snapObj.point.distanceTo(snapObj.a);
-      const db = snapObj.point.distanceTo(snapObj.b);
-
-      graph[snapKey] = {};
-      graph[snapKey][aKey] = da;
-      graph[aKey][snapKey] = da;
-
-      graph[snapKey][bKey] = db;
-      graph[bKey][snapKey] = db;
-    }
-
-    // insert the snapped start and end into graph
-    insertSnapNode(startSnap);
-    insertSnapNode(endSnap);
-
-    // run Dijkstra
-    let startKey = key(startSnap.point);
-    let endKey = key(endSnap.point);
-    let pathKeys = dijkstra(graph, startKey, endKey);
-
-    // convert keys back into Leaflet LatLng
-    let coords = pathKeys.map(k => {
-      let [lat, lng] = k.split(",").map(Number);
-      return L.latLng(lat, lng);
+    let seq = ++routeRequestSeq;
+
+    fetch(`/api/route?from=${start.lat},${start.lng}&to=${end.lat},${end.lng}`)
+    .then(res => res.json().then(data => ({ ok: res.ok, data })))
+    .then(({ ok, data }) => {
+      // a newer GPS update already asked for a route; drop this one
+      if (seq !== routeRequestSeq) return;
+      if (!ok) return callback(data.error || "No nearby path found", null);
+
+      let coords = data.coordinates.map(c => L.latLng(c[0], c[1]));
+
+      callback(null, [{
+        name: "Campus Route",
+        coordinates: coords,
+        instructions: [],
+        summary: {
+          totalDistance: data.distance,
+          totalTime: data.duration
+        },
+        inputWaypoints: waypoints,
+        waypoints: coords,
+        bounds: L.polyline(coords).getBounds()
+      }]);
+    })
+    .catch(err => {
+      if (seq === routeRequestSeq) callback(err, null);
     });
-
-    // force exact start & end positions in the polyline
-    if (!coords[0].equals(start)) coords.unshift(start);
-    if (!coords[coords.length - 1].equals(end)) coords.push(end);
-
-    let totalDist = polylineDistance(coords);
-
-    // return result
-    callback(null, [{
-      name: "Campus Route",
-      coordinates: coords,
-      instructions: [],
-      summary: { 
-        totalDistance: totalDist, 
-        totalTime: totalDist / 1.4
-      },
-      inputWaypoints: waypoints,
-      waypoints: coords,
-      bounds: L.polyline(coords).getBounds()
-    }]);
   }
 };
 
@@ -0,0 +1,118 @@
+# user_cache.py
+"""
+Per-process cache behind the Flask-Login user loader.
+
+The loader runs on every authenticated request. Instead of a SELECT each
+time, the user's column values are kept for USER_CACHE_TTL seconds and
+turned back into a session-attached ``User`` with
+``session.merge(load=False)``, which issues no SQL. Any flush that updates
+or deletes a user row drops that user from the cache (again after the
+commit, so a concurrent request can't re-cache the old row).
+
+That invalidation only reaches the process that made the write. Other
+worker processes would keep serving their copy, so the fields that decide
+access (``is_active`` and ``role``) are re-read with a two-column
+primary-key SELECT once they are USER_CACHE_AUTH_TTL seconds old (default
+5). A deactivated or demoted user therefore keeps access in other workers
+for at most USER_CACHE_AUTH_TTL seconds; the other columns (name, email,
+...) can be up to USER_CACHE_TTL seconds stale there.
+"""
+import threading
+import time
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from .memory_cache import MemoryBackend
+
+DIRTY_KEY = "user_cache_dirty"
+AUTH_FIELDS = ("is_active", "role")
+
+
+class UserCache:
+
+    def __init__(self):
+        self.backend = MemoryBackend(1000)
+        self.ttl = 60
+        self.auth_ttl = 5
+        self.hits = 0
+        self.misses = 0
+        self._model = None
+        self._db = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app, db, model):
+        self.ttl = float(app.config.setdefault("USER_CACHE_TTL", 60))
+        self.auth_ttl = float(app.config.setdefault("USER_CACHE_AUTH_TTL", 5))
+        self.backend = MemoryBackend(int(app.config.setdefault("USER_CACHE_MAX_ENTRIES", 1000)))
+        self._db = db
+        self._model = model
+        if not event.contains(model, "after_update", self._on_change):
+            event.listen(model, "after_update", self._on_change)
+            event.listen(model, "after_delete", self._on_change)
+            event.listen(Session, "after_commit", self._after_commit)
+            event.listen(Session, "after_rollback", self._after_rollback)
+        app.extensions["user_cache"] = self
+
+    # -------------------
+    # Invalidation
+    # -------------------
+    def invalidate(self, user_id):
+        self.backend.delete(int(user_id))
+
+    def _on_change(self, mapper, connection, target):
+        self.invalidate(target.id)
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault(DIRTY_KEY, set()).add(target.id)
+
+    def _after_commit(self, session):
+        for user_id in session.info.pop(DIRTY_KEY, ()):
+            self.invalidate(user_id)
+
+    def _after_rollback(self, session):
+        session.info.pop(DIRTY_KEY, None)
+
+    # -------------------
+    # Lookup
+    # -------------------
+    def _snapshot(self, user):
+        return {attr.key: getattr(user, attr.key) for attr in inspect(self._model).column_attrs}
+
+    def _recheck(self, user_id, entry, now):
+        """Re-read the auth fields of a cached user; None if they changed."""
+        snapshot, loaded_at, _ = entry
+        model = self._model
+        row = self._db.session.execute(
+            select(*(getattr(model, field) for field in AUTH_FIELDS)).where(model.id == user_id)
+        ).first()
+        if row is None or tuple(row) != tuple(snapshot[field] for field in AUTH_FIELDS):
+            self.invalidate(user_id)
+            return None
+        entry = (snapshot, loaded_at, now)
+        self.backend.set(user_id, entry, self.ttl - (now - loaded_at))
+        return entry
+
+    def get(self, user_id):
+        """Session-attached user for ``user_id``, or None if it doesn't exist."""
+        user_id = int(user_id)
+        now = time.time()
+        entry = self.backend.get(user_id)  # (column values, loaded at, auth fields checked at)
+        if entry is not None and now - entry[2] > self.auth_ttl:
+            entry = self._recheck(user_id, entry, now)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            user = self._db.session.get(self._model, user_id)
+            if user is not None:
+                self.backend.set(user_id, (self._snapshot(user), now, now), self.ttl)
+            return user
+
+        with self._lock:
+            self.hits += 1
+        user = self._model(**entry[0])
+        make_transient_to_detached(user)
+        return self._db.session.merge(user, load=False)
+
+    def stats(self):
+        return {"entries": len(self.backend), "hits": self.hits, "misses": self.misses}
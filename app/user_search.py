@@ -0,0 +1,97 @@
+# user_search.py
+"""
+Bounded user search for the admin pages.
+
+On SQLite the username, email and name columns are mirrored into an FTS5
+table (``user_fts``) that triggers keep in sync, with prefix indexes so
+that type-ahead queries like "ali" or "ali@mm" are index lookups. Other
+databases fall back to prefix LIKE filters. Results are always pages of
+at most ``limit`` users in id order, continued with ``after=<last id>``
+(keyset pagination), so the cost of a page never depends on how many
+accounts exist.
+"""
+import re
+
+from sqlalchemy import DDL, event, or_, text
+
+from app import db
+from .models import User
+
+PAGE_SIZE = 50
+
+FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS user_fts USING fts5("
+    " username, email, name, content='user', content_rowid='id',"
+    " tokenize='unicode61', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS user_fts_ai AFTER INSERT ON user BEGIN"
+    " INSERT INTO user_fts (rowid, username, email, name)"
+    " VALUES (new.id, new.username, new.email, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS user_fts_ad AFTER DELETE ON user BEGIN"
+    " INSERT INTO user_fts (user_fts, rowid, username, email, name)"
+    " VALUES ('delete', old.id, old.username, old.email, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS user_fts_au AFTER UPDATE OF username, email, name ON user BEGIN"
+    " INSERT INTO user_fts (user_fts, rowid, username, email, name)"
+    " VALUES ('delete', old.id, old.username, old.email, old.name);"
+    " INSERT INTO user_fts (rowid, username, email, name)"
+    " VALUES (new.id, new.username, new.email, new.name); END",
+]
+
+_TOKEN = re.compile(r"\w+")
+_has_fts = {}  # engine url -> bool
+
+
+def register_fts():
+    """Create the FTS table and triggers whenever create_all creates ``user``."""
+    if User.__table__.info.get("fts_registered"):
+        return
+    User.__table__.info["fts_registered"] = True
+    for statement in FTS_DDL:
+        event.listen(User.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+
+def fts_available():
+    key = str(db.engine.url)
+    if key not in _has_fts:
+        _has_fts[key] = db.engine.dialect.name == "sqlite" and db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_fts'")
+        ).first() is not None
+    return _has_fts[key]
+
+
+def fts_query(q):
+    """Every word of ``q`` as a quoted prefix term, e.g. 'ali mmu' -> '"ali"* "mmu"*'."""
+    return " ".join(f'"{token}"*' for token in _TOKEN.findall(q))
+
+
+def search_users(q="", after=0, limit=PAGE_SIZE):
+    """One page of users matching ``q`` with id > ``after``.
+
+    Returns (users, next_after); next_after is None on the last page.
+    """
+    after = after or 0
+    q = (q or "").strip()
+    if q and not _TOKEN.search(q):
+        return [], None
+
+    if q and fts_available():
+        ids = [row[0] for row in db.session.execute(
+            text("SELECT rowid FROM user_fts WHERE user_fts MATCH :q AND rowid > :after"
+                 " ORDER BY rowid LIMIT :limit"),
+            {"q": fts_query(q), "after": after, "limit": limit + 1},
+        )]
+        users = User.query.filter(User.id.in_(ids[:limit])).order_by(User.id).all() if ids else []
+        more = len(ids) > limit
+    else:
+        query = User.query.filter(User.id > after)
+        if q:
+            pattern = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            query = query.filter(or_(
+                User.username.ilike(pattern, escape="\\"),
+                User.email.ilike(pattern, escape="\\"),
+                User.name.ilike(pattern, escape="\\"),
+            ))
+        users = query.order_by(User.id).limit(limit + 1).all()
+        more = len(users) > limit
+        users = users[:limit]
+
+    return users, (users[-1].id if more and users else None)
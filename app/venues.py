@@ -0,0 +1,128 @@
+# venues.py
+"""
+MMU venue code parser.
+
+Venue codes follow the official format
+[Campus][Building][Wing][Type][Floor][Room Number], e.g. CLCR2045 =
+Cyberjaya Campus, FOE, Wing C, Room, Second Floor, room 045. The lookup
+tables and the regex are built once at import time; parse results are
+memoised because timetables repeat the same handful of rooms.
+"""
+import re
+from functools import lru_cache
+from types import MappingProxyType
+
+# Only Cyberjaya campus for now
+CAMPUSES = MappingProxyType({
+    'C': 'Cyberjaya Campus',
+})
+
+# Building mapping (2nd alphabet)
+BUILDINGS = MappingProxyType({
+    'J': 'FCM (Faculty of Creative Multimedia)',
+    'L': 'FOE (Faculty of Engineering)',
+    'N': 'CLC (Cyberjaya Learning Centre)',  # 'N' = CLC (not FCM)
+    'Q': 'FCI (Faculty of Computing and Informatics)',
+    'R': 'FOM (Faculty of Management)',
+})
+
+# Wing mapping (3rd alphabet)
+WINGS = MappingProxyType({
+    'M': 'Main Area',
+    'A': 'Wing A',
+    'B': 'Wing B',
+    'C': 'Wing C',
+})
+
+# Type mapping (4th alphabet)
+ROOM_TYPES = MappingProxyType({
+    'R': 'Room',
+    'X': 'Theatre',
+})
+
+# Floor mapping (1st number)
+FLOORS = MappingProxyType({
+    '0': 'Ground Floor',
+    '1': 'First Floor',
+    '2': 'Second Floor',
+    '3': 'Third Floor',
+})
+
+# Hardcoded tips per building (adds flavor—edit/remove as needed)
+BUILDING_TIPS = MappingProxyType({
+    'FOE (Faculty of Engineering)': 'Engineering central—labs and WiFi are top-notch, but stairs get crowded!',
+    'FCI (Faculty of Computing and Informatics)': 'IT/computing hub—great for coding sessions, strong AC too.',
+    'FOM (Faculty of Management)': 'Business spot—quiet lounges for presentations.',
+    'FCM (Faculty of Creative Multimedia)': 'Creative vibes—art supplies nearby if needed.',
+    'CLC (Cyberjaya Learning Centre)': 'Central learning area—easy access from main gate.',
+})
+
+# A venue code anywhere in an (upper-cased) chat message, partial or full
+VENUE_CODE_RE = re.compile(r'\b([C][JLNQR][MABC][RX]?\s*\d{0,4})\b')
+
+
+def normalise_code(venue_code):
+    return venue_code.upper().strip().replace(' ', '')
+
+
+@lru_cache(maxsize=4096)
+def _parse(venue_code):
+    if len(venue_code) < 4:  # Min for partial (C + building + wing + type)
+        return None
+
+    building = BUILDINGS.get(venue_code[1], 'Unknown Building')
+    wing = WINGS.get(venue_code[2], 'Unknown Wing')
+    room_type = ROOM_TYPES.get(venue_code[3], 'Unknown Type')
+
+    # Full code carries floor + room; partial codes default to ground floor, room 001
+    if len(venue_code) >= 7:
+        floor_char, room_raw = venue_code[4], venue_code[5:]
+    else:
+        floor_char, room_raw = '0', '001'
+
+    floor = FLOORS.get(floor_char, 'Unknown Floor')
+    room_number = room_raw.zfill(3)
+
+    return MappingProxyType({
+        'campus': CAMPUSES.get(venue_code[0], 'Cyberjaya Campus'),
+        'building': building,
+        'wing': wing,
+        'type': room_type,
+        'floor': floor,
+        'room_number': room_number,
+        'full_location': f"{building}, {wing}, {floor}, {room_type} {room_number}",
+        'tip': BUILDING_TIPS.get(building, ''),
+    })
+
+
+def parse_venue_code(venue_code):
+    """
+    Parse one MMU venue code into a dict, or None if it is too short.
+    Example: CNMX = Cyberjaya Campus, CLC, Main Area, Theatre (defaults: Ground Floor, room 001)
+    Example: CNMX1001 = Cyberjaya Campus, CLC, Main Area, Theatre, First Floor, room 001
+    """
+    venue_code = normalise_code(venue_code)
+    parsed = _parse(venue_code)
+    if parsed is None:
+        print(f"Venue code too short: {venue_code} (needs at least 4 chars)")
+        return None
+    return dict(parsed)
+
+
+def parse_venue_codes(venue_codes):
+    """Parse many codes (e.g. a whole timetable) in one go.
+
+    Returns a list of dicts (or None for codes that can't be parsed) in the
+    same order as the input.
+    """
+    results = []
+    for code in venue_codes:
+        parsed = _parse(normalise_code(code)) if isinstance(code, str) else None
+        results.append(dict(parsed) if parsed is not None else None)
+    return results
+
+
+def find_venue_code(message):
+    """Return the first venue code mentioned in a chat message, or None."""
+    match = VENUE_CODE_RE.search(message.upper())
+    return match.group(1).replace(' ', '') if match else None
@@ -0,0 +1,101 @@
+# visit_log.py
+"""
+Batched visit logging.
+
+The map page queues "visited place X" events and posts them in batches
+(see queueVisit in scripts.js). A batch is written in one transaction:
+location names are resolved through a per-process name -> id map (unknown
+names are created with a single INSERT ... ON CONFLICT DO NOTHING), all
+visits go in with one executemany INSERT, and the daily rollup is bumped
+in the same commit.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select
+
+from app import db
+from .models import Location, Visit
+from .rollups import record_visits, upsert_insert
+
+MAX_VISIT_BATCH = 100
+MAX_EVENT_AGE = timedelta(days=1)  # older client timestamps are clamped
+
+
+class LocationIds:
+    """Name -> Location.id for this process. Locations are never renamed,
+    so entries only need adding, never invalidating."""
+
+    def __init__(self):
+        self._ids = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._ids is None:
+                self._ids = dict(db.session.execute(select(Location.name, Location.id)).all())
+
+    def resolve(self, names):
+        """({name: id} for ``names``, {name: id} of rows created now).
+
+        New locations are inserted on the current session; call
+        ``remember`` with the second dict once the caller has committed.
+        """
+        if self._ids is None:
+            self._load()
+        ids = {name: self._ids[name] for name in names if name in self._ids}
+        missing = sorted(set(names) - ids.keys())
+        created = {}
+        if missing:
+            stmt = upsert_insert(Location).on_conflict_do_nothing(index_elements=[Location.name])
+            db.session.execute(stmt, [{"name": name} for name in missing])
+            created = dict(db.session.execute(
+                select(Location.name, Location.id).where(Location.name.in_(missing))
+            ).all())
+            ids.update(created)
+        return ids, created
+
+    def remember(self, ids):
+        if self._ids is not None:
+            self._ids.update(ids)
+
+
+location_ids = LocationIds()
+
+
+def event_time(value, now):
+    """Client timestamp (epoch ms) as a naive UTC datetime, clamped to the last day."""
+    try:
+        when = datetime.fromtimestamp(float(value) / 1000, timezone.utc).replace(tzinfo=None)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return now
+    return min(max(when, now - MAX_EVENT_AGE), now)
+
+
+def log_visits(events, user_id=None):
+    """Write a batch of {"location": name, "ts": epoch_ms} events; returns how many were logged."""
+    now = datetime.utcnow()
+    events = [
+        e for e in events
+        if isinstance(e, dict) and isinstance(e.get("location"), str) and e["location"].strip()
+    ]
+    if not events:
+        return 0
+
+    ids, created = location_ids.resolve({e["location"].strip() for e in events})
+    rows = []
+    for e in events:
+        timestamp = event_time(e.get("ts"), now)
+        rows.append({
+            "user_id": user_id,
+            "location_id": ids[e["location"].strip()],
+            "timestamp": timestamp,
+            # the server's local day, which is what date.today() gives for a live event
+            "visit_date": timestamp.replace(tzinfo=timezone.utc).astimezone().date(),
+        })
+
+    db.session.execute(insert(Visit), rows)
+    record_visits(rows)
+    db.session.commit()
+    location_ids.remember(created)
+    return len(rows)
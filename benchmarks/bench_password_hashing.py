@@ -0,0 +1,62 @@
+"""
+Cost of each password hashing setting.
+
+    python benchmarks/bench_password_hashing.py [--seconds 2] [methods ...]
+
+For every PASSWORD_HASH_METHOD candidate, reports how long one login
+(verifying a stored hash) takes on a single core and the resulting
+logins/sec per core, plus the cost of hashing a new password. Pick the
+strongest setting whose logins/sec still covers peak load divided by the
+number of worker cores.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import check_password_hash, generate_password_hash  # noqa: E402
+
+from app.passwords import normalise_method  # noqa: E402
+
+DEFAULT_METHODS = [
+    "pbkdf2:sha256",          # werkzeug's default iterations (what the app used)
+    "pbkdf2:sha256:600000",
+    "pbkdf2:sha256:260000",
+    "scrypt:32768:8:1",       # werkzeug's default scrypt
+    "scrypt:16384:8:1",
+    "scrypt:8192:8:1",
+]
+
+
+def time_per_call(fn, seconds):
+    fn()  # warm up
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return elapsed / calls
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("methods", nargs="*", default=DEFAULT_METHODS)
+    parser.add_argument("--seconds", type=float, default=2.0, help="time spent per measurement")
+    args = parser.parse_args()
+
+    password = "correct horse battery staple"
+    print(f"{'method':<26} {'login ms':>9} {'logins/s/core':>14} {'hash ms':>9}")
+    for method in args.methods:
+        method = normalise_method(method)
+        stored = generate_password_hash(password, method=method)
+        verify = time_per_call(lambda: check_password_hash(stored, password), args.seconds)
+        create = time_per_call(lambda: generate_password_hash(password, method=method), args.seconds / 2)
+        print(f"{method:<26} {verify * 1000:9.1f} {1 / verify:14.1f} {create * 1000:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
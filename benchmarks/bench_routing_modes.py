@@ -0,0 +1,185 @@
+"""
+Query latency and preprocessing cost of the routing modes on synthetic grids.
+
+    python benchmarks/bench_routing_modes.py [--sizes 10000,100000,1000000]
+                                             [--queries 20] [--landmarks 8]
+
+Each grid is a square lattice with 1 m spacing and edge lengths between 1
+and 1.5 m, so the straight-line distance is a valid A* heuristic. For
+every size it reports, over the same random origin/destination pairs:
+
+  dijkstra  plain Dijkstra (the old client-side router)
+  astar     A* with the straight-line heuristic (ROUTING_MODE=astar)
+  alt       A* with landmarks (ROUTING_MODE=alt), after preprocessing
+
+with the median query time, the average share of nodes each query
+expanded, and the landmark preprocessing time and memory. The three modes
+must agree on every distance.
+
+Every route query also snaps both endpoints onto the nearest segment, so
+for the same lattice, laid out with a path every 10 m, it reports:
+
+  snap-scan  a linear scan over all segments (the old CampusGraph.snap,
+             only a few queries on large grids)
+  snap-grid  the SegmentGrid lookup CampusGraph.snap uses now, with the
+             time to build the index as preprocessing
+
+The 1M-node grid takes a few minutes.
+"""
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.graph_prep import SegmentGrid  # noqa: E402
+from app.landmarks import LandmarkTable  # noqa: E402
+from app.routing import SNAP_CELL_M, astar  # noqa: E402
+
+SNAP_SPACING_M = 10.0
+MAX_SCAN_QUERIES = 5
+
+
+def make_grid(side, seed=0):
+    """CSR arrays of a side x side grid; node r * side + c sits at (c, r) metres."""
+    rng = random.Random(seed)
+    n = side * side
+    neighbours = [[] for _ in range(n)]
+    for r in range(side):
+        for c in range(side):
+            u = r * side + c
+            if c + 1 < side:
+                w = 1.0 + 0.5 * rng.random()
+                neighbours[u].append((u + 1, w))
+                neighbours[u + 1].append((u, w))
+            if r + 1 < side:
+                w = 1.0 + 0.5 * rng.random()
+                neighbours[u].append((u + side, w))
+                neighbours[u + side].append((u, w))
+    offsets, targets, weights = array("i", [0]), array("i"), array("d")
+    for edges in neighbours:
+        for v, w in edges:
+            targets.append(v)
+            weights.append(w)
+        offsets.append(len(targets))
+    return offsets, targets, weights
+
+
+def make_segments(side):
+    """Points and (a, b) segments of the same grid, SNAP_SPACING_M apart."""
+    points = [(c * SNAP_SPACING_M, r * SNAP_SPACING_M) for r in range(side) for c in range(side)]
+    segments = []
+    for r in range(side):
+        for c in range(side):
+            u = r * side + c
+            if c + 1 < side:
+                segments.append((u, u + 1))
+            if r + 1 < side:
+                segments.append((u, u + side))
+    return points, segments
+
+
+def scan_nearest(points, segments, x, y):
+    """(segment id, distance) of the closest segment, checking every one."""
+    best, best_d = None, math.inf
+    for sid, (a, b) in enumerate(segments):
+        (ax, ay), (bx, by) = points[a], points[b]
+        dx, dy = bx - ax, by - ay
+        seg2 = dx * dx + dy * dy
+        t = 0.0 if seg2 == 0 else max(0.0, min(1.0, ((x - ax) * dx + (y - ay) * dy) / seg2))
+        d = math.hypot(x - (ax + t * dx), y - (ay + t * dy))
+        if d < best_d:
+            best, best_d = sid, d
+    return best, best_d
+
+
+def time_snaps(snap, queries):
+    times, found = [], []
+    for x, y in queries:
+        start = time.perf_counter()
+        found.append(snap(x, y))
+        times.append(time.perf_counter() - start)
+    return times, found
+
+
+def run_queries(graph, pairs, heuristic_for):
+    offsets, targets, weights = graph
+    times, settled, costs = [], [], []
+    for s, t in pairs:
+        h = heuristic_for(s, t)
+        start = time.perf_counter()
+        cost, _, _, expanded = astar(offsets, targets, weights, [(s, 0.0)], {t: 0.0}, h)
+        times.append(time.perf_counter() - start)
+        settled.append(expanded)
+        costs.append(cost)
+    return times, settled, costs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="approximate node counts")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--landmarks", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'nodes':>9} {'mode':<9} {'query ms':>10} {'expanded':>9} {'preprocess s':>13} {'MB':>6}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        side = max(2, round(math.sqrt(size)))
+        n = side * side
+        graph = make_grid(side)
+        rng = random.Random(1)
+        pairs = [(rng.randrange(n), rng.randrange(n)) for _ in range(args.queries)]
+
+        def straight_line(s, t):
+            tr, tc = divmod(t, side)
+            return lambda v: math.hypot(v // side - tr, v % side - tc)
+
+        start = time.perf_counter()
+        table = LandmarkTable.build(*graph, args.landmarks)
+        preprocess = time.perf_counter() - start
+        megabytes = sum(d.itemsize * len(d) for d in table.distances) / 1e6
+
+        def landmarks(s, t):
+            bound = table.heuristic([(s, 0.0)], {t: 0.0})
+            line = straight_line(s, t)
+            return lambda v: max(line(v), bound(v))
+
+        modes = [
+            ("dijkstra", lambda s, t: (lambda v: 0.0), None),
+            ("astar", straight_line, None),
+            ("alt", landmarks, (preprocess, megabytes)),
+        ]
+        reference = None
+        for name, heuristic_for, cost in modes:
+            times, settled, costs = run_queries(graph, pairs, heuristic_for)
+            if reference is None:
+                reference = costs
+            elif any(abs(a - b) > 1e-6 for a, b in zip(costs, reference)):
+                raise SystemExit(f"{name} disagrees with dijkstra on {n} nodes")
+            share = statistics.mean(settled) / n
+            extra = f"{cost[0]:13.2f} {cost[1]:6.1f}" if cost else f"{'-':>13} {'-':>6}"
+            print(f"{n:>9} {name:<9} {statistics.median(times) * 1000:10.2f} {share:9.2%} {extra}")
+
+        points, segments = make_segments(side)
+        extent = (side - 1) * SNAP_SPACING_M
+        queries = [(rng.uniform(0, extent), rng.uniform(0, extent)) for _ in range(args.queries)]
+        start = time.perf_counter()
+        seg_grid = SegmentGrid(points, segments, SNAP_CELL_M)
+        indexing = time.perf_counter() - start
+        scan_times, scanned = time_snaps(lambda x, y: scan_nearest(points, segments, x, y),
+                                         queries[:MAX_SCAN_QUERIES])
+        grid_times, snapped = time_snaps(seg_grid.nearest, queries)
+        if any(abs(a[1] - b[2]) > 1e-9 for a, b in zip(scanned, snapped)):
+            raise SystemExit(f"snap-grid disagrees with snap-scan on {n} nodes")
+        print(f"{n:>9} {'snap-scan':<9} {statistics.median(scan_times) * 1000:10.2f} {'-':>9} {'-':>13} {'-':>6}")
+        print(f"{n:>9} {'snap-grid':<9} {statistics.median(grid_times) * 1000:10.2f} {'-':>9} "
+              f"{indexing:13.2f} {'-':>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Concurrent write throughput of the SQLite profiles.
+
+    python benchmarks/bench_sqlite_writes.py [--writers 8] [--readers 2] [--writes 300]
+
+Each writer thread commits single-row inserts (like log_visit / activity
+logging) while reader threads run the dashboard-style aggregate, against a
+fresh database file per profile. Reports committed writes per second,
+p95 commit latency and how many writes failed with "database is locked".
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import (  # noqa: E402
+    Column, Date, DateTime, Integer, MetaData, String, Table, create_engine, func, insert, select,
+)
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app.db_profile import SQLITE_PROFILES, engine_options, install_sqlite_pragmas  # noqa: E402
+
+metadata = MetaData()
+visits = Table(
+    "visit", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("location_id", Integer),
+    Column("page", String(200)),
+    Column("timestamp", DateTime),
+    Column("visit_date", Date),
+)
+
+
+def run(profile, writers, readers, writes):
+    tmpdir = tempfile.mkdtemp()
+    uri = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    engine = create_engine(uri, **engine_options(uri, pool_size=writers + readers))
+    install_sqlite_pragmas(engine, SQLITE_PROFILES[profile])
+    metadata.create_all(engine)
+
+    latencies = []
+    locked = [0]
+    done = threading.Event()
+    lock = threading.Lock()
+
+    def writer(n):
+        mine = []
+        for i in range(writes):
+            start = time.perf_counter()
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(visits).values(
+                        location_id=i % 20, page=f"/page/{n}",
+                        timestamp=datetime.utcnow(), visit_date=date.today(),
+                    ))
+            except OperationalError:
+                with lock:
+                    locked[0] += 1
+                continue
+            mine.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(mine)
+
+    def reader():
+        while not done.is_set():
+            with engine.connect() as conn:
+                conn.execute(
+                    select(visits.c.location_id, func.count()).group_by(visits.c.location_id)
+                ).all()
+
+    read_threads = [threading.Thread(target=reader) for _ in range(readers)]
+    write_threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for t in read_threads:
+        t.start()
+    start = time.perf_counter()
+    for t in write_threads:
+        t.start()
+    for t in write_threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    for t in read_threads:
+        t.join()
+    engine.dispose()
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+    p95 = statistics.quantiles(latencies, n=20)[-1] * 1000 if len(latencies) > 1 else float("nan")
+    print(f"{profile:<8} {len(latencies) / elapsed:10.0f} writes/s   p95 {p95:7.2f} ms   locked {locked[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--writes", type=int, default=300, help="commits per writer")
+    parser.add_argument("--profiles", nargs="+", default=list(SQLITE_PROFILES))
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers x {args.writes} commits, {args.readers} readers\n")
+    for profile in args.profiles:
+        run(profile, args.writers, args.readers, args.writes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Cold start time of a worker process.
+
+    python benchmarks/bench_startup.py [--runs 5]
+
+Each run starts a fresh interpreter (so nothing is cached in-process),
+imports the app package, calls create_app() and serves one request, and
+reports the median of each phase. Run ``flask --app app.app init-db``
+first so the database exists.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+application = app.create_app()
+t2 = time.perf_counter()
+application.test_client().get("/health-check")
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1, "first_request": t3 - t2}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    env = dict(os.environ, SECRET_KEY=os.environ.get("SECRET_KEY", "bench"))
+    results = []
+    for _ in range(args.runs):
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD], cwd=ROOT, env=env,
+            capture_output=True, text=True, check=True,
+        ).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+
+    print(f"median of {args.runs} cold starts")
+    total = 0.0
+    for phase in ("import", "create_app", "first_request"):
+        value = statistics.median(r[phase] for r in results)
+        total += value
+        print(f"  {phase:<14} {value * 1000:8.1f} ms")
+    print(f"  {'total':<14} {total * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
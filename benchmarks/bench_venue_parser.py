@@ -0,0 +1,62 @@
+"""
+Micro-benchmark for the venue code parser.
+
+    python benchmarks/bench_venue_parser.py [--codes 20000]
+
+Reports the per-code cost of parse_venue_code on cold codes (memo cache
+cleared), on a realistic timetable where rooms repeat, of the bulk
+parse_venue_codes API, and of finding a code inside a chat message.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.venues import _parse, find_venue_code, parse_venue_code, parse_venue_codes  # noqa: E402
+
+
+def random_code(rng):
+    return (
+        "C"
+        + rng.choice("JLNQR")
+        + rng.choice("MABC")
+        + rng.choice("RX")
+        + rng.choice("0123")
+        + f"{rng.randint(1, 99):03d}"
+    )
+
+
+def per_code(label, fn, items, cold=False, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        if cold:
+            _parse.cache_clear()
+        start = time.perf_counter()
+        fn(items)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<34} {best / len(items) * 1e6:8.2f} µs/code")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--codes", type=int, default=20000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    unique = [random_code(rng) for _ in range(args.codes)]
+    timetable = [rng.choice(unique[:200]) for _ in range(args.codes)]  # rooms repeat a lot
+    messages = [f"hey where is {code} ah, class starts at 2" for code in timetable]
+
+    print(f"{args.codes} codes\n")
+    per_code("cold parse_venue_code", lambda xs: [parse_venue_code(x) for x in xs], unique, cold=True)
+    per_code("warm parse_venue_code (timetable)", lambda xs: [parse_venue_code(x) for x in xs], timetable)
+    per_code("cold parse_venue_codes (bulk)", parse_venue_codes, unique, cold=True)
+    per_code("warm parse_venue_codes (timetable)", parse_venue_codes, timetable)
+    per_code("find_venue_code in message", lambda xs: [find_venue_code(x) for x in xs], messages)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""baseline schema from db.create_all
+
+The tables themselves are created by db.create_all() in `flask init-db`;
+this empty revision marks that starting point so later revisions apply
+cleanly to databases that were created before migrations existed.
+
+Revision ID: 0001_baseline
+Revises: 
+Create Date: 2026-10-16 23:58:04.222170
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    pass
+
+
+def downgrade():
+    pass
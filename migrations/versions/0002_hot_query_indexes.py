@@ -0,0 +1,38 @@
+"""composite indexes for analytics hot queries
+
+Check the resulting plans with ``flask --app app.app explain-queries``.
+Indexes are created with IF NOT EXISTS because db.create_all() already
+adds them to brand-new databases.
+
+Revision ID: 0002_hot_query_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-16 23:58:06.612341
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_hot_query_indexes'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_page_view_view_date_page", "page_view", ["view_date", "page"]),
+    ("ix_page_view_user_id_timestamp", "page_view", ["user_id", "timestamp"]),
+    ("ix_visit_location_id_visit_date", "visit", ["location_id", "visit_date"]),
+    ("ix_visit_user_id_timestamp", "visit", ["user_id", "timestamp"]),
+    ("ix_activity_log_timestamp", "activity_log", ["timestamp"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
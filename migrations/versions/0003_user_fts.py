@@ -0,0 +1,54 @@
+"""full-text index for the admin user search
+
+SQLite only: an external-content FTS5 table over user.username, email and
+name, kept in sync by triggers and filled from the existing rows. New
+databases get the same objects from db.create_all() (see
+app/user_search.py).
+
+Revision ID: 0003_user_fts
+Revises: 0002_hot_query_indexes
+Create Date: 2026-10-17 00:41:12.508113
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_user_fts'
+down_revision = '0002_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+STATEMENTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS user_fts USING fts5("
+    " username, email, name, content='user', content_rowid='id',"
+    " tokenize='unicode61', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS user_fts_ai AFTER INSERT ON user BEGIN"
+    " INSERT INTO user_fts (rowid, username, email, name)"
+    " VALUES (new.id, new.username, new.email, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS user_fts_ad AFTER DELETE ON user BEGIN"
+    " INSERT INTO user_fts (user_fts, rowid, username, email, name)"
+    " VALUES ('delete', old.id, old.username, old.email, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS user_fts_au AFTER UPDATE OF username, email, name ON user BEGIN"
+    " INSERT INTO user_fts (user_fts, rowid, username, email, name)"
+    " VALUES ('delete', old.id, old.username, old.email, old.name);"
+    " INSERT INTO user_fts (rowid, username, email, name)"
+    " VALUES (new.id, new.username, new.email, new.name); END",
+    "INSERT INTO user_fts (user_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for statement in STATEMENTS:
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for trigger in ("user_fts_ai", "user_fts_ad", "user_fts_au"):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS user_fts")